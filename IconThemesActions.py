@@ -0,0 +1,227 @@
+# Icon themes for FreeCAD
+# Copyright (C) 2016, 2017, 2018, 2019 triplus @ FreeCAD
+#
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+
+"""Registry of named main window actions.
+
+The main window is scanned once. Afterwards the registry follows the
+ChildAdded and ChildRemoved events of the main window, actions of new
+children are collected on the next access. FreeCAD commands create
+their QAction inside a Gui::Action object, a direct child of the main
+window, so new commands are picked up without walking the whole tree.
+"""
+
+
+from PySide import QtGui
+from PySide import QtCore
+
+
+class ActionRegistry(QtCore.QObject):
+    """Keep a map of unique action object names to actions."""
+
+    def __init__(self, root):
+        super(ActionRegistry, self).__init__(root)
+        self.root = root
+        self.found = {}
+        self.unique = {}
+        self.duplicates = set()
+        self.sources = {}
+        self.pending = []
+        self.scanned = False
+        self.stale = False
+        self.generation = 0
+        root.installEventFilter(self)
+
+    def eventFilter(self, obj, event):
+        """Collect children added to or removed from the root."""
+        t = event.type()
+
+        if t == QtCore.QEvent.ChildAdded:
+            if self.scanned:
+                self.pending.append(event.child())
+        elif t == QtCore.QEvent.ChildRemoved:
+            if self.scanned:
+                self.remove(event.child())
+
+        return False
+
+    def scan(self):
+        """Full scan of the root object (once)."""
+        self.scanned = True
+        del self.pending[:]
+        for child in self.root.children():
+            if child is not self:
+                self.add(child)
+
+    def add(self, child):
+        """Register actions of a root child."""
+        keep = True
+
+        try:
+            if isinstance(child, QtGui.QAction):
+                actions = [child] + child.findChildren(QtGui.QAction)
+            elif child.inherits("QAction"):
+                # Reported while still under construction, the wrapper
+                # doesn't know it is an action. Look it up again by name.
+                keep = False
+                name = child.objectName()
+                actions = []
+                if name:
+                    for a in self.root.findChildren(QtGui.QAction, name):
+                        if not any(a is i for i in self.found.get(name, [])):
+                            actions.append(a)
+            else:
+                actions = child.findChildren(QtGui.QAction)
+        except RuntimeError:
+            # Wrapper reported while the object was constructed from
+            # Python, it is gone now. Look for new children later.
+            self.stale = True
+            return
+
+        entries = []
+        for a in actions:
+            name = a.objectName()
+            if (name and a.text() and
+                    not any(a is i for i in self.found.get(name, []))):
+                entries.append((name, a))
+                self.found.setdefault(name, []).append(a)
+                self.update(name)
+
+        if entries and keep:
+            self.sources[child] = entries
+
+    def remove(self, child):
+        """Forget actions of a removed root child."""
+        for i, source in enumerate(self.pending):
+            if source is child:
+                del self.pending[i]
+                break
+
+        entries = self.sources.pop(child, None)
+        if not entries:
+            return
+
+        for name, a in entries:
+            found = self.found.get(name, [])
+            found[:] = [i for i in found if i is not a]
+            if not found:
+                self.found.pop(name, None)
+            self.update(name)
+
+    def update(self, name):
+        """Update unique and duplicate bookkeeping of one name."""
+        count = len(self.found.get(name, []))
+        self.generation += 1
+
+        if count == 1:
+            self.unique[name] = self.found[name][0]
+            self.duplicates.discard(name)
+        else:
+            self.unique.pop(name, None)
+            if count > 1:
+                self.duplicates.add(name)
+            else:
+                self.duplicates.discard(name)
+
+    def actions(self):
+        """Return {object name: action} of actions with a unique name.
+
+        The returned dictionary is owned by the registry, generation
+        changes whenever it does.
+        """
+        if not self.scanned:
+            self.scan()
+
+        while self.pending:
+            self.add(self.pending.pop(0))
+
+        if self.stale:
+            self.stale = False
+            for child in self.root.children():
+                if child is not self and child not in self.sources:
+                    self.add(child)
+
+        return self.unique
+
+
+def collect(root):
+    """Named actions of a root object in one pass, {name: [actions]}."""
+    found = {}
+    for a in root.findChildren(QtGui.QAction):
+        name = a.objectName()
+        if name and a.text():
+            found.setdefault(name, []).append(a)
+    return found
+
+
+class DefaultIcons(object):
+    """Default icons of themed actions.
+
+    A default icon the caller marks as derivable (the command pixmap) is
+    not kept, it is derived again when it is needed. Other default icons
+    are kept once per distinct icon and dropped when the last action
+    using them gets its default back.
+    """
+
+    def __init__(self, derive=None):
+        self.derive = derive
+        self.names = {}
+        self.icons = {}
+        self.users = {}
+
+    def __contains__(self, name):
+        return name in self.names
+
+    def __iter__(self):
+        return iter(list(self.names))
+
+    def __len__(self):
+        return len(self.names)
+
+    def store(self, name, icon, derivable=False):
+        """Remember the default icon of an action (once)."""
+        if name in self.names:
+            return
+
+        if self.derive and derivable:
+            self.names[name] = None
+            return
+
+        key = icon.cacheKey()
+        self.names[name] = key
+        self.icons.setdefault(key, icon)
+        self.users[key] = self.users.get(key, 0) + 1
+
+    def pop(self, name):
+        """Default icon of an action, forget it."""
+        key = self.names.pop(name)
+
+        if key is None:
+            return self.derive(name) or QtGui.QIcon()
+
+        icon = self.icons[key]
+        self.users[key] -= 1
+        if not self.users[key]:
+            del self.users[key]
+            del self.icons[key]
+        return icon
+
+    def footprint(self):
+        """Number of actions, derived and kept icons."""
+        return {"defaults": len(self.names),
+                "derived": sum(1 for i in self.names.values() if i is None),
+                "kept": len(self.icons)}
@@ -0,0 +1,412 @@
+# Icon themes for FreeCAD
+# Copyright (C) 2016, 2017, 2018, 2019 triplus @ FreeCAD
+#
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+
+"""Rendered icon cache.
+
+SVG icons are rendered once and stored as PNG files, keyed by the SVG
+content hash, pixel size and device pixel ratio. Least recently used
+files are removed when the cache grows over the "CacheSize" parameter
+(MiB). image() may be called from worker threads.
+
+Legacy theme icons and the icon previews go through the cache. Icons
+of .rcc themes are drawn by Qt's own icon theme engine, which FreeCAD
+uses to look them up, and are not cached here.
+
+Content keys of SVG files are remembered in the startup manifest, an
+icon painted in an earlier session is then drawn from the cache without
+reading and hashing its SVG, as long as the file is unchanged.
+"""
+
+
+import os
+import hashlib
+import threading
+import FreeCAD as App
+from PySide import QtGui
+from PySide import QtCore
+from PySide import QtSvg
+import IconThemesCatalog
+import IconThemesManifest
+import IconThemesStats
+import IconThemesZip
+
+p = App.ParamGet("User parameter:BaseApp/IconThemes")
+
+files = {}
+sources = {}
+shared = {}
+counters = {"hits": 0, "misses": 0, "written": 0, "evicted": 0}
+loaded = []
+lock = threading.RLock()
+
+
+def cachePath():
+    """Folder containing rendered icons."""
+    return IconThemesCatalog.dataPath() + "cache" + os.path.sep
+
+
+def limit():
+    """Cache size limit in bytes."""
+    return p.GetInt("CacheSize", 64) * 1024 * 1024
+
+
+def load():
+    """Index the cache folder (once per session)."""
+    with lock:
+        if loaded:
+            return
+        loaded.append(True)
+
+        path = cachePath()
+        if not os.path.isdir(path):
+            return
+
+        for i in os.scandir(path):
+            if i.name.endswith(".png"):
+                st = i.stat()
+                files[i.name] = [st.st_mtime, st.st_size]
+
+
+def digest(data):
+    """Content hash of SVG data."""
+    return hashlib.sha1(data).hexdigest()
+
+
+def fileName(key, size, ratio):
+    """Cache file name of a rendering."""
+    return (key +
+            "-" +
+            str(size) +
+            "-" +
+            str(int(round(ratio * 100))) +
+            ".png")
+
+
+def render(data, pixels):
+    """Render SVG data to a square transparent image."""
+    renderer = QtSvg.QSvgRenderer(QtCore.QByteArray(data))
+    image = QtGui.QImage(pixels,
+                         pixels,
+                         QtGui.QImage.Format_ARGB32_Premultiplied)
+    image.fill(0)
+
+    if renderer.isValid():
+        painter = QtGui.QPainter(image)
+        renderer.render(painter)
+        painter.end()
+
+    return image
+
+
+def cached(key, size, ratio=1.0):
+    """Rendered image from the cache or None."""
+    load()
+
+    name = fileName(key, size, ratio)
+    path = cachePath() + name
+
+    if name in files:
+        result = QtGui.QImage(path, "PNG")
+        with lock:
+            if not result.isNull():
+                counters["hits"] += 1
+                if name in files:
+                    files[name][0] = touch(path)
+                result.setDevicePixelRatio(ratio)
+                return result
+            files.pop(name, None)
+
+    return None
+
+
+def image(data, size, ratio=1.0, key=None):
+    """Rendered image of SVG data from the cache or freshly rendered."""
+    if key is None:
+        key = digest(data)
+
+    result = cached(key, size, ratio)
+    if result is not None:
+        return result
+
+    name = fileName(key, size, ratio)
+
+    with lock:
+        counters["misses"] += 1
+    result = render(data, int(round(size * ratio)))
+    store(result, name)
+    result.setDevicePixelRatio(ratio)
+
+    return result
+
+
+def pixmap(data, size, ratio=1.0, key=None):
+    """Rendered pixmap of SVG data."""
+    return QtGui.QPixmap.fromImage(image(data, size, ratio, key))
+
+
+def touch(path):
+    """Mark a cache file as recently used."""
+    try:
+        os.utime(path, None)
+        return os.path.getmtime(path)
+    except OSError:
+        return 0
+
+
+def store(result, name):
+    """Write a rendering to the cache and evict old files."""
+    path = cachePath()
+
+    try:
+        if not os.path.isdir(path):
+            os.makedirs(path)
+    except OSError:
+        return
+
+    if result.save(path + name, "PNG"):
+        with lock:
+            size = os.path.getsize(path + name)
+            files[name] = [os.path.getmtime(path + name), size]
+            counters["written"] += size
+            evict()
+
+
+def evict():
+    """Remove least recently used files over the size limit."""
+    total = sum(i[1] for i in files.values())
+    cap = limit()
+
+    if total <= cap:
+        return
+
+    for name in sorted(files, key=lambda i: files[i][0]):
+        try:
+            os.remove(cachePath() + name)
+        except OSError:
+            pass
+        total -= files.pop(name)[1]
+        counters["evicted"] += 1
+        if total <= cap * 0.9:
+            break
+
+
+def clear():
+    """Remove all cached renderings."""
+    load()
+    for name in list(files):
+        try:
+            os.remove(cachePath() + name)
+        except OSError:
+            pass
+        files.pop(name)
+
+
+def stats():
+    """Return cache hits, misses and bytes."""
+    load()
+    with lock:
+        result = dict(counters)
+        result["files"] = len(files)
+        result["bytes"] = sum(i[1] for i in files.values())
+    return result
+
+
+def remember(source, key):
+    """Record the content key of an SVG file."""
+    if not source.startswith(":"):
+        with lock:
+            sources[source] = [IconThemesZip.fingerprint(source), key]
+
+
+def knownKey(source):
+    """Content key of an unchanged SVG file or None.
+
+    Keys are known for files read in this or, through the manifest, an
+    earlier session.
+    """
+    if source.startswith(":"):
+        return None
+
+    with lock:
+        record = sources.get(source)
+
+    if record is None:
+        entry = IconThemesManifest.get("keys")
+        if entry is not None:
+            record = entry.get("sources", {}).get(source)
+
+    if record and record[0] == IconThemesZip.fingerprint(source):
+        with lock:
+            sources[source] = record
+        return record[1]
+    return None
+
+
+def sourceKeys():
+    """Manifest section with content keys of SVG files of this session."""
+    with lock:
+        return {"fingerprints": {}, "sources": dict(sources)}
+
+
+def readSource(source):
+    """Contents of a file, zip archive member or ":/" resource path."""
+    parts = IconThemesZip.split(source)
+
+    if parts:
+        return IconThemesZip.read(*parts)
+
+    f = QtCore.QFile(source)
+
+    if not f.open(QtCore.QIODevice.ReadOnly):
+        return b""
+
+    data = f.readAll().data()
+    f.close()
+    return data
+
+
+class SvgIconEngine(QtGui.QIconEngine):
+    """Icon engine drawing SVG icons through the rendered icon cache.
+
+    Only the source is stored. The SVG is read the first time the icon
+    is painted and every requested size is rendered once.
+    """
+
+    def __init__(self, source, data=None, key=None):
+        super(SvgIconEngine, self).__init__()
+        self.source = source
+        self.data = data
+        self.key = key
+        self.pixmaps = {}
+
+    def load(self):
+        """Read the SVG (once)."""
+        if self.data is None:
+            self.data = readSource(self.source)
+        if self.key is None:
+            self.key = digest(self.data)
+            remember(self.source, self.key)
+
+    def pixmap(self, size, mode, state):
+        """Cached rendering of the icon."""
+        return self.scaledPixmap(size, mode, state, 1.0)
+
+    def scaledPixmap(self, size, mode, state, scale):
+        """Cached rendering for a device pixel ratio (size in points)."""
+        scale = float(scale) or 1.0
+        memo = (size.width(), size.height(), mode, state, scale)
+
+        if memo not in self.pixmaps:
+            pixels = max(size.width(), size.height())
+
+            if self.key is None and self.data is None:
+                self.key = knownKey(self.source)
+
+            result = None
+            if self.key is not None:
+                result = cached(self.key, pixels, scale)
+            if result is None:
+                self.load()
+                result = image(self.data, pixels, scale, self.key)
+            result = QtGui.QPixmap.fromImage(result)
+
+            if mode == QtGui.QIcon.Disabled:
+                opt = QtGui.QStyleOption()
+                style = QtGui.QApplication.style()
+                result = style.generatedIconPixmap(mode, result, opt)
+                result.setDevicePixelRatio(scale)
+
+            self.pixmaps[memo] = result
+
+        return self.pixmaps[memo]
+
+    def footprint(self):
+        """Number of rendered pixmaps and their size in bytes."""
+        return (len(self.pixmaps),
+                sum(i.width() * i.height() * 4 for i in self.pixmaps.values()))
+
+    def paint(self, painter, rect, mode, state):
+        """Paint the icon at the resolution of the paint device."""
+        device = painter.device()
+        scale = device.devicePixelRatioF() if device else 1.0
+        painter.drawPixmap(rect, self.scaledPixmap(rect.size(),
+                                                   mode,
+                                                   state,
+                                                   scale))
+
+    def clone(self):
+        """Copy of the engine."""
+        return SvgIconEngine(self.source, self.data, self.key)
+
+
+def icon(source):
+    """Icon of an SVG file or resource, loaded on first paint."""
+    return QtGui.QIcon(SvgIconEngine(source))
+
+
+def sharedIcon(source):
+    """Icon of an SVG file or resource, one icon per source."""
+    if source not in shared:
+        engine = SvgIconEngine(source)
+        shared[source] = [QtGui.QIcon(engine), engine]
+    return shared[source][0]
+
+
+def forget(source):
+    """Drop the shared icon of a changed source."""
+    shared.pop(source, None)
+
+
+def move(source, target):
+    """Share the icon of a source as the icon of an identical file.
+
+    Widgets keep the icon and its rendered pixmaps, the icon reads the
+    target from now on. False if the target has a shared icon already.
+    """
+    if target in shared or source not in shared:
+        return False
+
+    entry = shared.pop(source)
+    entry[1].source = target
+    shared[target] = entry
+    return True
+
+
+def prune(used):
+    """Drop shared icons of sources not in used."""
+    for source in list(shared):
+        if source not in used:
+            del shared[source]
+
+
+def footprint():
+    """Shared icons, their rendered pixmaps and bytes."""
+    pixmaps = 0
+    size = 0
+
+    for icon, engine in shared.values():
+        n, b = engine.footprint()
+        pixmaps += n
+        size += b
+
+    return {"icons": len(shared),
+            "pixmaps": pixmaps,
+            "bytes": size}
+
+
+IconThemesStats.footprints["icons"] = footprint
@@ -0,0 +1,314 @@
+# Icon themes for FreeCAD
+# Copyright (C) 2016, 2017, 2018, 2019 triplus @ FreeCAD
+#
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+
+"""Icon themes catalog.
+
+The catalog remembers which icon themes every external resource file
+provides. Entries are keyed by the resource path and validated against
+the file modification time and size, so they survive between sessions.
+Resource files are inspected with the pure Python reader, they don't
+need to be registered. Themes installed in the icon store are described
+by their manifest. Only the ":/icons/*" prefixes are ever inspected.
+"""
+
+
+import os
+import json
+import threading
+import FreeCAD as App
+from PySide import QtGui
+from PySide import QtCore
+import IconThemesRcc
+import IconThemesIndex
+import IconThemesStore
+
+FORMAT = 3
+
+catalog = {}
+registered = {}
+unreadable = {}
+loaded = []
+lock = threading.RLock()
+
+
+def dataPath():
+    """Folder containing icon themes data (catalog, caches)."""
+    path = (App.getUserAppDataDir() +
+            "IconThemes" +
+            os.path.sep)
+    return path
+
+
+def storePath():
+    """Folder of the content-addressed icon store."""
+    return IconThemesStore.storePath(App.getUserAppDataDir())
+
+
+def catalogFile():
+    """Catalog file path."""
+    return dataPath() + "catalog.json"
+
+
+def fingerprint(path):
+    """Return modification time and size of a file or None."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_mtime, st.st_size]
+
+
+def load():
+    """Load the catalog from disk (once per session)."""
+    with lock:
+        if loaded:
+            return
+        loaded.append(True)
+
+        try:
+            with open(catalogFile(), "r") as f:
+                data = json.load(f)
+        except (IOError, OSError, ValueError):
+            data = {}
+
+        if isinstance(data, dict):
+            catalog.update(data)
+
+
+def save():
+    """Write the catalog to disk."""
+    path = dataPath()
+    try:
+        if not os.path.isdir(path):
+            os.makedirs(path)
+        with lock:
+            with open(catalogFile() + ".tmp", "w") as f:
+                json.dump(catalog, f, indent=1, sort_keys=True)
+            os.replace(catalogFile() + ".tmp", catalogFile())
+    except (IOError, OSError):
+        App.Console.PrintLog("Icon themes: unable to save catalog.\n")
+
+
+def themeFolders():
+    """List folders under the ":/icons" prefix."""
+    return QtCore.QDir(":/icons").entryList(QtCore.QDir.Dirs |
+                                            QtCore.QDir.NoDotAndDotDot)
+
+
+def readResource(folder, name):
+    """Contents of ":/icons/<folder>/<name>" or None."""
+    f = QtCore.QFile(":/icons/" + folder + "/" + name)
+
+    if not f.open(QtCore.QIODevice.ReadOnly):
+        return None
+
+    data = f.readAll().data()
+    f.close()
+    return data
+
+
+def listResource(folder, directory):
+    """File names inside ":/icons/<folder>/<directory>"."""
+    return QtCore.QDir(":/icons/" +
+                       folder +
+                       "/" +
+                       directory).entryList(QtCore.QDir.Files)
+
+
+themes = IconThemesIndex.Themes(readResource, listResource)
+
+
+def readName(folder):
+    """Theme name of ":/icons/<folder>" or None."""
+    with lock:
+        theme = themes.theme(folder)
+
+    if theme is None:
+        return None
+    return theme.name
+
+
+def readInherits(folder):
+    """Inherited themes of ":/icons/<folder>"."""
+    with lock:
+        theme = themes.theme(folder)
+
+    if theme is None:
+        return []
+    return theme.inherits
+
+
+def forget():
+    """Forget parsed themes after resource data changed."""
+    with lock:
+        themes.clear()
+
+
+def iconNames(folder):
+    """Icon names of ":/icons/<folder>" and the themes it inherits."""
+    with lock:
+        return themes.names(folder)
+
+
+def resolve(icon, size=64, folder=None):
+    """Resource path of an icon in the (current) theme or None.
+
+    The inheritance chain and per-theme lookup tables are built once,
+    later lookups are dictionary lookups.
+    """
+    if folder is None:
+        folder = QtGui.QIcon.themeName()
+
+    with lock:
+        result = themes.resolve(folder, icon, size)
+
+    if result is None:
+        return None
+    return ":/icons/" + "/".join(result)
+
+
+def scan(folders):
+    """Describe themes found in registered ":/icons/<folder>" folders."""
+    result = []
+
+    for folder in folders:
+        name = readName(folder)
+        if name is not None:
+            result.append({"name": name,
+                           "folder": folder,
+                           "inherits": readInherits(folder),
+                           "directories": [],
+                           "icons": 0})
+
+    return result
+
+
+def fresh(path):
+    """Catalog entry for path if still valid, otherwise None."""
+    load()
+    entry = catalog.get(path)
+
+    if (entry and
+            entry.get("format") == FORMAT and
+            entry.get("key") == fingerprint(path)):
+        return entry
+    return None
+
+
+def inspect(path):
+    """Catalog entry for a resource file, read it if needed.
+
+    The resource file is not registered. Return None if the file can't
+    be read. Safe to call from a worker thread.
+    """
+    with lock:
+        entry = fresh(path)
+
+        if entry is None:
+            key = fingerprint(path)
+            if key is not None and unreadable.get(path) == key:
+                return None
+            try:
+                if IconThemesStore.isManifest(path):
+                    found = IconThemesStore.themes(storePath(), path)
+                else:
+                    found = IconThemesRcc.themes(path)
+            except (IOError, OSError, ValueError) as e:
+                # Warn once per file version, the bad pack is skipped.
+                unreadable[path] = key
+                App.Console.PrintWarning("Icon themes: unable to read " +
+                                         path +
+                                         " (" +
+                                         str(e) +
+                                         ").\n")
+                return None
+            entry = {"format": FORMAT,
+                     "key": key,
+                     "themes": found}
+            catalog[path] = entry
+            save()
+
+    return entry
+
+
+def beforeRegister():
+    """Snapshot ":/icons" before registering a resource."""
+    return set(themeFolders())
+
+
+def onRegistered(path, before):
+    """Record themes of a freshly registered resource."""
+    with lock:
+        themes.clear()
+    entry = inspect(path)
+
+    if entry is None:
+        added = sorted(set(themeFolders()) - before)
+        entry = {"format": FORMAT,
+                 "key": fingerprint(path),
+                 "themes": scan(added)}
+
+    with lock:
+        registered[path] = entry
+
+
+def onUnregistered(path):
+    """Forget themes of an unregistered resource for this session."""
+    with lock:
+        registered.pop(path, None)
+        themes.clear()
+
+
+def names(paths=()):
+    """Return [name, folder] pairs of all available icon themes.
+
+    Themes of the resource files in paths are included even when the
+    files are not registered. Runs on a worker thread, shared state is
+    only read under the lock.
+    """
+    load()
+    result = []
+    external = {}
+    available = {}
+
+    with lock:
+        entries = list(registered.values())
+
+    for entry in entries:
+        for theme in entry["themes"]:
+            external[theme["folder"]] = theme["name"]
+
+    for path in paths:
+        entry = inspect(path)
+        if entry is not None:
+            for theme in entry["themes"]:
+                available.setdefault(theme["folder"], theme["name"])
+
+    folders = themeFolders()
+    for folder in folders:
+        if folder in external:
+            result.append([external[folder], folder])
+            continue
+        name = readName(folder)
+        if name is not None:
+            result.append([name, folder])
+
+    for folder in sorted(set(available) - set(folders)):
+        result.append([available[folder], folder])
+
+    return result
@@ -0,0 +1,522 @@
+# Icon themes for FreeCAD
+# Copyright (C) 2016, 2017, 2018, 2019 triplus @ FreeCAD
+#
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+
+"""Inspect, build and benchmark icon themes without FreeCAD.
+
+Paths can be an Icons folder, resource files (.rcc), theme folders
+(with index.theme), legacy theme folders (SVG files), legacy theme
+archives (.zip) and themes installed in the icon store (.icons). Only
+render needs PySide2 or PySide6.
+
+    python -m IconThemes list ~/.FreeCAD/Gui/Icons
+    python -m IconThemes validate demo.rcc demo-rcc-assets
+    python -m IconThemes stats --slowest 10 DemoTheme.zip
+    python -m IconThemes coverage --actions export.csv DemoTheme.zip
+    python -m IconThemes import --data ~/.FreeCAD DemoTheme.zip
+    python -m IconThemes optimize --precision 2 demo-rcc-assets
+    python -m IconThemes compile --output demo.rcc demo-rcc-assets
+    python -m IconThemes render --sizes 16,32,64 --workers 4 demo.rcc
+"""
+
+
+import os
+import sys
+import json
+import time
+import argparse
+import multiprocessing
+import xml.etree.ElementTree as ET
+import IconThemesRcc
+import IconThemesSvg
+import IconThemesIndex
+import IconThemesCoverage
+import IconThemesStore
+import IconThemesSources
+
+
+unreadable = []
+
+
+def readable(source):
+    """Index and icon names of a theme can be read."""
+    try:
+        source.index()
+        source.names()
+    except (IOError, OSError, ValueError) as e:
+        sys.stderr.write("Unable to read " +
+                         source.label() +
+                         " (" +
+                         str(e) +
+                         ")\n")
+        return False
+    except KeyError:
+        pass
+    return True
+
+
+def collect(paths):
+    """Readable themes found at all paths."""
+    result = []
+    for path in paths:
+        found = IconThemesSources.sources(path)
+        if not found:
+            sys.stderr.write("No icon themes found in " + path + "\n")
+        for source in found:
+            if readable(source):
+                result.append(source)
+            else:
+                unreadable.append(source)
+    return result
+
+
+def output(data, args, lines):
+    """Print data as JSON or as text lines."""
+    if args.json:
+        json.dump(data, sys.stdout, indent=1, sort_keys=True)
+        sys.stdout.write("\n")
+    else:
+        for line in lines:
+            sys.stdout.write(line + "\n")
+
+
+def commandList(args):
+    """List themes."""
+    data = []
+    lines = []
+
+    for source in collect(args.paths):
+        entry = {"kind": source.kind,
+                 "path": source.path,
+                 "name": source.name}
+        text = source.index()
+        theme = IconThemesIndex.parse(text) if text else None
+        if theme is not None:
+            entry["name"] = theme.name
+            entry["inherits"] = theme.inherits
+            entry["directories"] = [d.name for d in theme.directories]
+        entry["icons"] = sum(1 for i in source.icons())
+        data.append(entry)
+
+        line = entry["name"] + ": " + source.label()
+        line += ", " + str(entry["icons"]) + " icons"
+        if entry.get("inherits"):
+            line += ", inherits " + ", ".join(entry["inherits"])
+        lines.append(line)
+
+    output(data, args, lines)
+    return 0
+
+
+def problems(source):
+    """Problems of a theme."""
+    result = []
+
+    if source.kind == "rcc" and not source.folder:
+        return ["no icon themes in resource file"]
+
+    try:
+        text = source.index()
+    except (IOError, OSError, ValueError, KeyError):
+        return ["missing index.theme"]
+
+    if text is not None:
+        result.extend(IconThemesIndex.validate(text))
+
+    icons = 0
+    for path, data in source.icons():
+        icons += 1
+        if not data:
+            result.append(path + " is empty")
+        elif path.endswith(".svg"):
+            try:
+                ET.fromstring(data)
+            except ET.ParseError as e:
+                result.append(path + " is not valid SVG (" + str(e) + ")")
+    if not icons:
+        result.append("no icons")
+
+    return result
+
+
+def commandValidate(args):
+    """Validate themes, status 1 if any is invalid."""
+    data = {}
+    lines = []
+
+    for source in collect(args.paths):
+        found = problems(source)
+        data[source.label()] = found
+        if found:
+            lines.append(source.label() + ": " + str(len(found)) + " problems")
+            lines.extend("  " + i for i in found)
+        else:
+            lines.append(source.label() + ": ok")
+
+    output(data, args, lines)
+    return 1 if any(data.values()) or not data else 0
+
+
+def commandStats(args):
+    """Icon counts, sizes and the slowest icons to parse."""
+    data = []
+    lines = []
+
+    for source in collect(args.paths):
+        svg = 0
+        other = 0
+        size = 0
+        times = []
+        for path, icon in source.icons():
+            size += len(icon)
+            if path.endswith(".svg"):
+                svg += 1
+                times.append((IconThemesSvg.parseTime(icon), path))
+            else:
+                other += 1
+        times.sort(reverse=True)
+
+        entry = {"theme": source.label(),
+                 "svg": svg,
+                 "other": other,
+                 "bytes": size,
+                 "parse": sum(i[0] for i in times),
+                 "slowest": [[path, t] for t, path in times[:args.slowest]]}
+        data.append(entry)
+
+        lines.append(source.label() + ": " +
+                     str(svg) + " SVG, " +
+                     str(other) + " other, " +
+                     str(size) + " bytes, parsed in " +
+                     "%.1f" % (entry["parse"] * 1000) + " ms")
+        for path, t in entry["slowest"]:
+            lines.append("  " + "%.2f" % (t * 1000) + " ms " + path)
+
+    output(data, args, lines)
+    return 0
+
+
+def commandCoverage(args):
+    """Coverage of a command set, exported from FreeCAD or listed."""
+    actions, duplicates = IconThemesCoverage.readActions(args.actions)
+    data = []
+    lines = []
+
+    for path in args.paths:
+        result = IconThemesCoverage.analyze(
+            actions,
+            IconThemesCoverage.themeIcons(path),
+            duplicates)
+        result["theme"] = path
+        data.append(result)
+
+        lines.append(path + ": " +
+                     str(len(result["covered"])) + " covered, " +
+                     str(len(result["missing"])) + " missing, " +
+                     str(len(result["unused"])) + " unused, " +
+                     str(len(result["duplicates"])) + " duplicates (" +
+                     "%.0f" % (result["coverage"] * 100) + "%)")
+        if args.unused:
+            lines.extend("  " + i for i in result["unused"])
+
+        if args.output and len(args.paths) == 1:
+            IconThemesCoverage.write(result, args.output)
+        elif args.output:
+            base, ext = os.path.splitext(args.output)
+            name = os.path.basename(path.rstrip("/" + os.path.sep))
+            IconThemesCoverage.write(result, base + "-" + name + ext)
+
+    output(data, args, lines)
+    return 0
+
+
+def commandImport(args):
+    """Import themes into the icon store of a FreeCAD user data folder."""
+    data = []
+    lines = []
+
+    for path in args.paths:
+        try:
+            reports = IconThemesStore.importTheme(args.data,
+                                                  path,
+                                                  args.name,
+                                                  args.force)
+        except (IOError, OSError, ValueError, KeyError) as e:
+            sys.stderr.write("Unable to import " + path +
+                             " (" + str(e) + ")\n")
+            unreadable.append(path)
+            continue
+
+        for report in reports:
+            data.append(report)
+            lines.append(report["name"] + " (" +
+                         report["kind"] + "): " +
+                         str(report["files"]) + " files, " +
+                         str(report["added"]) + " added to the store, " +
+                         str(report["shared"]) + " bytes shared")
+
+    if args.collect:
+        removed = IconThemesStore.collect(args.data)
+        lines.append(str(removed) + " unused files removed from the store")
+
+    output(data, args, lines)
+    return 0
+
+
+def commandOptimize(args):
+    """Optimize SVG icons of theme folders and .rcc files."""
+    if args.output and len(args.paths) > 1:
+        sys.stderr.write("--output needs a single path\n")
+        return 2
+
+    data = []
+    lines = []
+
+    for path in args.paths:
+        try:
+            if path.lower().endswith(".rcc") and os.path.isfile(path):
+                reports = IconThemesSvg.optimizeRcc(path, args.output,
+                                                    args.precision,
+                                                    args.workers)
+            elif os.path.isdir(path):
+                reports = IconThemesSvg.optimizeFolder(path, args.output,
+                                                       args.precision,
+                                                       args.workers)
+            else:
+                sys.stderr.write("No theme folder or .rcc file at " +
+                                 path + "\n")
+                unreadable.append(path)
+                continue
+        except (IOError, OSError, ValueError, KeyError) as e:
+            sys.stderr.write("Unable to optimize " + path +
+                             " (" + str(e) + ")\n")
+            unreadable.append(path)
+            continue
+
+        for report in reports:
+            report["path"] = path
+            data.append(report)
+            lines.append(path +
+                         (" (" + report["theme"] + ")"
+                          if report["theme"] else "") + ": " +
+                         str(report["files"]) + " SVG, " +
+                         str(report["before"]) + " -> " +
+                         str(report["after"]) + " bytes, parsed in " +
+                         "%.1f" % (report["parseBefore"] * 1000) + " -> " +
+                         "%.1f" % (report["parseAfter"] * 1000) + " ms")
+
+    output(data, args, lines)
+    return 0
+
+
+def commandCompile(args):
+    """Compile theme folders into resource files (.rcc)."""
+    if args.output and len(args.paths) > 1:
+        sys.stderr.write("--output needs a single path\n")
+        return 2
+
+    data = []
+    lines = []
+
+    for path in args.paths:
+        folder = path.rstrip("/" + os.path.sep) or path
+        target = args.output or folder + ".rcc"
+        try:
+            result = IconThemesRcc.compileTheme(folder,
+                                                target,
+                                                args.name,
+                                                args.format_version)
+        except (IOError, OSError, ValueError) as e:
+            sys.stderr.write("Unable to compile " + path +
+                             " (" + str(e) + ")\n")
+            unreadable.append(path)
+            continue
+
+        entry = {"theme": folder,
+                 "output": target,
+                 "bytes": len(result)}
+        data.append(entry)
+        lines.append(folder + ": " + target + ", " +
+                     str(entry["bytes"]) + " bytes")
+
+    output(data, args, lines)
+    return 0
+
+
+def renderInit():
+    """Start a headless Qt application in a worker process."""
+    global qt
+
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+    for name in ("PySide6", "PySide2"):
+        try:
+            qt = __import__(name, fromlist=["QtCore", "QtGui", "QtSvg"])
+            break
+        except ImportError:
+            continue
+    else:
+        raise SystemExit("PySide2 or PySide6 is required to render")
+
+    if not qt.QtGui.QGuiApplication.instance():
+        qt.app = qt.QtGui.QGuiApplication(["IconThemes"])
+
+
+def render(item):
+    """Render one SVG icon at every size, return the elapsed time."""
+    data, sizes = item
+    QtCore = qt.QtCore
+    QtGui = qt.QtGui
+
+    start = time.perf_counter()
+    renderer = qt.QtSvg.QSvgRenderer(QtCore.QByteArray(data))
+    if not renderer.isValid():
+        return None
+
+    for size in sizes:
+        image = QtGui.QImage(size, size,
+                             QtGui.QImage.Format_ARGB32_Premultiplied)
+        image.fill(0)
+        painter = QtGui.QPainter(image)
+        renderer.render(painter)
+        painter.end()
+
+    return time.perf_counter() - start
+
+
+def commandRender(args):
+    """Render throughput of SVG icons."""
+    sizes = [int(i) for i in args.sizes.split(",") if i.strip()]
+    data = []
+    lines = []
+
+    for source in collect(args.paths):
+        items = [(icon, sizes) for path, icon in source.icons()
+                 if path.endswith(".svg")]
+
+        start = time.perf_counter()
+        if args.workers == 1:
+            renderInit()
+            results = [render(i) for i in items]
+        else:
+            pool = multiprocessing.Pool(args.workers, renderInit)
+            try:
+                results = pool.map(render, items, chunksize=16)
+            finally:
+                pool.close()
+                pool.join()
+        elapsed = time.perf_counter() - start
+
+        rendered = [i for i in results if i is not None]
+        entry = {"theme": source.label(),
+                 "icons": len(rendered),
+                 "invalid": len(results) - len(rendered),
+                 "sizes": sizes,
+                 "seconds": elapsed,
+                 "cpu": sum(rendered),
+                 "pixmapsPerSecond": (len(rendered) * len(sizes) / elapsed
+                                      if elapsed else 0.0)}
+        data.append(entry)
+
+        lines.append(source.label() + ": " +
+                     str(entry["icons"]) + " icons at " +
+                     ", ".join(str(i) for i in sizes) + " px in " +
+                     "%.1f" % (elapsed * 1000) + " ms, " +
+                     "%.0f" % entry["pixmapsPerSecond"] + " pixmaps/s" +
+                     (", " + str(entry["invalid"]) + " invalid"
+                      if entry["invalid"] else ""))
+
+    output(data, args, lines)
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="IconThemes",
+                                     description=__doc__.split("\n")[0])
+    parser.add_argument("--json", action="store_true",
+                        help="write results as JSON")
+    commands = parser.add_subparsers(dest="command")
+    commands.required = True
+
+    c = commands.add_parser("list", help="list themes")
+    c.set_defaults(function=commandList)
+
+    c = commands.add_parser("validate", help="validate themes")
+    c.set_defaults(function=commandValidate)
+
+    c = commands.add_parser("stats", help="icon counts, sizes, parse times")
+    c.add_argument("--slowest", type=int, default=5,
+                   help="number of slowest icons to list")
+    c.set_defaults(function=commandStats)
+
+    c = commands.add_parser("coverage", help="command coverage")
+    c.add_argument("--actions", required=True,
+                   help="exported coverage (.csv, .json) or action names")
+    c.add_argument("--output", help="write results to a .csv or .json file")
+    c.add_argument("--unused", action="store_true",
+                   help="list icons no action uses")
+    c.set_defaults(function=commandCoverage)
+
+    c = commands.add_parser("import", help="import themes into the store")
+    c.add_argument("--data", required=True,
+                   help="FreeCAD user data folder (e.g. ~/.FreeCAD)")
+    c.add_argument("--name", help="installed theme name")
+    c.add_argument("--force", action="store_true",
+                   help="replace installed themes of the same name")
+    c.add_argument("--collect", action="store_true",
+                   help="remove files no installed theme uses")
+    c.set_defaults(function=commandImport)
+
+    c = commands.add_parser("optimize", help="optimize SVG icons")
+    c.add_argument("--precision", type=int, default=3,
+                   help="decimals kept in coordinates")
+    c.add_argument("--output",
+                   help="write to another folder or .rcc file (one path)")
+    c.add_argument("--workers", type=int, default=None,
+                   help="optimizer processes (default: CPU count)")
+    c.set_defaults(function=commandOptimize)
+
+    c = commands.add_parser("compile", help="compile theme folders")
+    c.add_argument("--output",
+                   help="resource file (one path, default: <folder>.rcc)")
+    c.add_argument("--name", help="theme name (default: from index.theme)")
+    c.add_argument("--format-version", type=int, default=1,
+                   choices=(1, 2, 3),
+                   help="resource format version (1 works with Qt 4)")
+    c.set_defaults(function=commandCompile)
+
+    c = commands.add_parser("render", help="render throughput")
+    c.add_argument("--sizes", default="16,24,32,64",
+                   help="comma separated icon sizes")
+    c.add_argument("--workers", type=int, default=None,
+                   help="render processes (default: CPU count)")
+    c.set_defaults(function=commandRender)
+
+    for c in commands.choices.values():
+        c.add_argument("paths", nargs="+",
+                       help="Icons folder, theme folder, .rcc or .zip")
+
+    args = parser.parse_args(argv)
+    del unreadable[:]
+    status = args.function(args)
+    if unreadable:
+        return 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+# Icon themes for FreeCAD
+# Copyright (C) 2016, 2017, 2018, 2019 triplus @ FreeCAD
+#
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+
+"""Icon theme coverage of the command set.
+
+Actions are given as {action object name: icon name}. Legacy themes
+name icons after the action, .rcc themes after the command pixmap.
+Covered, missing and unused names are computed with set operations on
+the icon index of the theme. Actions sharing an object name are not
+themed by the legacy module, they are reported as duplicates.
+
+No FreeCAD required, results are written as CSV or JSON.
+"""
+
+
+import csv
+import json
+import IconThemesSources
+
+
+def themeIcons(path):
+    """Icon names of every theme found at a path."""
+    names = set()
+    for source in IconThemesSources.sources(path):
+        names.update(source.names())
+    return frozenset(names)
+
+
+def analyze(actions, icons, duplicates=(), inherited=frozenset()):
+    """Coverage of actions ({name: icon name}) by a set of icon names.
+
+    Icons of inherited themes cover actions too, they are never unused.
+    """
+    wanted = set(actions.values())
+    available = wanted & (icons | inherited)
+    duplicates = set(duplicates)
+
+    covered = sorted(i for i in actions if actions[i] in available)
+    missing = sorted(i for i in actions if actions[i] not in available)
+
+    return {"actions": len(actions),
+            "icons": len(icons),
+            "coverage": len(covered) / len(actions) if actions else 0.0,
+            "covered": [[i, actions[i]] for i in covered],
+            "missing": [[i, actions[i]] for i in missing],
+            "unused": sorted(icons - wanted - duplicates),
+            "duplicates": sorted([i, i in icons] for i in duplicates)}
+
+
+def rows(result):
+    """Result as (status, action, icon) rows."""
+    for name, icon in result["covered"]:
+        yield "covered", name, icon
+    for name, icon in result["missing"]:
+        yield "missing", name, icon
+    for icon in result["unused"]:
+        yield "unused", "", icon
+    for name, available in result["duplicates"]:
+        yield "duplicate", name, name if available else ""
+
+
+def write(result, path):
+    """Write a result to a JSON (.json) or CSV file."""
+    with open(path, "w", newline="") as f:
+        if path.lower().endswith(".json"):
+            json.dump(result, f, indent=1, sort_keys=True)
+        else:
+            w = csv.writer(f)
+            w.writerow(("status", "action", "icon"))
+            w.writerows(rows(result))
+
+
+def readActions(path):
+    """Actions from a file written by write() or a list of names.
+
+    A JSON result provides covered and missing actions and duplicates,
+    a CSV result the action and icon columns. Other files hold one
+    action name per line, optionally followed by a comma and icon name.
+    """
+    actions = {}
+    duplicates = set()
+
+    with open(path, newline="") as f:
+        if path.lower().endswith(".json"):
+            data = json.load(f)
+            for name, icon in data["covered"] + data["missing"]:
+                actions[name] = icon
+            duplicates.update(i[0] for i in data["duplicates"])
+            return actions, duplicates
+
+        for row in csv.reader(f):
+            if row == ["status", "action", "icon"]:
+                continue
+            elif len(row) == 3 and row[0] in ("covered", "missing"):
+                actions[row[1]] = row[2]
+            elif len(row) == 3 and row[0] == "duplicate":
+                duplicates.add(row[1])
+            elif len(row) == 3:
+                pass
+            elif row and row[0].strip():
+                name = row[0].strip()
+                if len(row) > 1 and row[1].strip():
+                    actions[name] = row[1].strip()
+                else:
+                    actions[name] = name
+
+    return actions, duplicates
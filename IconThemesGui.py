@@ -24,9 +24,25 @@ import FreeCADGui as Gui
 import FreeCAD as App
 from PySide import QtGui
 from PySide import QtCore
+import IconThemesActions
+import IconThemesCatalog
+import IconThemesCoverage
+import IconThemesIndex
+import IconThemesManifest
+import IconThemesStartup
+import IconThemesStats
+import IconThemesStore
+import IconThemesWatcher
+import IconThemesWorker
 
 mw = Gui.getMainWindow()
 p = App.ParamGet("User parameter:BaseApp/IconThemes")
+watcher = IconThemesWatcher.Watcher(mw)
+
+resources = {}
+resourceData = {}
+users = {}
+overlays = {}
 
 
 def iconThemesPath():
@@ -48,28 +64,65 @@ def iconThemesFiles():
         for f in os.listdir(path):
             if f.endswith(".rcc"):
                 files.append(f)
+            elif (f.endswith(IconThemesStore.EXTENSION) and
+                    IconThemesStore.load(path + f).get("kind") == "theme"):
+                files.append(f)
     return files
 
 
+def resourceLabel(name):
+    """Describe themes inside a resource file without registering it."""
+    path = os.path.join(iconThemesPath(), name)
+    entry = IconThemesCatalog.inspect(path)
+
+    if not entry:
+        return name
+
+    themes = []
+    for theme in entry["themes"]:
+        themes.append(theme["name"] +
+                      " (" +
+                      str(theme["icons"]) +
+                      " icons)")
+
+    return (name +
+            " - " +
+            ", ".join(themes or ["no themes"]) +
+            " - " +
+            str(max(1, entry["key"][1] // 1024)) +
+            " KiB")
+
+
+@IconThemesStats.instrument("registerResource")
 def registerResource(name, mode=True):
     """Register or unregister external binary resource."""
     path = iconThemesPath()
+    IconThemesStats.count("registerResource", files=1)
 
-    if os.path.isfile(os.path.join(path, name)):
+    if not mode or os.path.isfile(os.path.join(path, name)):
         if mode:
-            QtCore.QResource.registerResource(os.path.join(path, name))
+            before = IconThemesCatalog.beforeRegister()
+            if name.endswith(IconThemesStore.EXTENSION):
+                # Theme installed in the icon store, the data must be
+                # kept while it is registered.
+                data = IconThemesStore.build(IconThemesCatalog.storePath(),
+                                             os.path.join(path, name))
+                QtCore.QResource.registerResourceData(data)
+                resourceData[name] = data
+            else:
+                QtCore.QResource.registerResource(os.path.join(path, name))
+            IconThemesCatalog.onRegistered(os.path.join(path, name), before)
             text = "Icon themes: registered external resource"
             App.Console.PrintLog(text +
                                  " " +
                                  name +
                                  ".\n")
         else:
-            n = 10
-            unregister = True
-            while unregister and n:
-                unregister = (QtCore.QResource.unregisterResource(
-                    os.path.join(path, name)))
-                n -= 1
+            if name in resourceData:
+                QtCore.QResource.unregisterResourceData(resourceData.pop(name))
+            else:
+                QtCore.QResource.unregisterResource(os.path.join(path, name))
+            IconThemesCatalog.onUnregistered(os.path.join(path, name))
             text = "Icon themes: unregistered external resource"
             App.Console.PrintLog(text +
                                  " " +
@@ -82,37 +135,100 @@ def registerResource(name, mode=True):
                              ".\n")
 
 
+def enabledFiles():
+    """Resource files enabled in the preferences."""
+    enabled = p.GetString("Registered").split(",")
+    return [f for f in iconThemesFiles() if f in enabled]
+
+
+def themeFiles(folder):
+    """Enabled resource files needed by a theme and its Inherits chain.
+
+    Files the catalog can't describe are always needed.
+    """
+    providers = {}
+    inherits = {}
+    result = set()
+
+    for f in enabledFiles():
+        entry = IconThemesCatalog.inspect(os.path.join(iconThemesPath(), f))
+        if entry is None:
+            result.add(f)
+            continue
+        for theme in entry["themes"]:
+            providers.setdefault(theme["folder"], f)
+            inherits.setdefault(theme["folder"], theme["inherits"])
+
+    for i in IconThemesIndex.chain(folder, inherits.get):
+        result.add(providers[i])
+
+    return result
+
+
+def useResources(user, files):
+    """Register resource files a user needs, release the rest.
+
+    Files are reference counted, a file is registered for its first
+    user and unregistered when no user needs it anymore.
+    """
+    before = users.get(user, set())
+    after = set(files)
+
+    for f in sorted(after - before):
+        if not resources.get(f):
+            registerResource(f)
+        resources[f] = resources.get(f, 0) + 1
+
+    for f in sorted(before - after):
+        resources[f] -= 1
+        if not resources[f]:
+            del resources[f]
+            registerResource(f, False)
+
+    if after:
+        users[user] = after
+    else:
+        users.pop(user, None)
+
+
+def forgetResource(name):
+    """Drop all references to a removed resource file."""
+    if resources.pop(name, None):
+        registerResource(name, False)
+
+    for user in list(users):
+        users[user].discard(name)
+        if not users[user]:
+            del users[user]
+
+
+def useTheme(name):
+    """Register the resource files needed by a theme."""
+    useResources("theme", themeFiles(name))
+
+
+@IconThemesStats.instrument("iconThemesNames")
 def iconThemesNames():
-    """Extract icon themes names from registered resources."""
-    files = []
-    names = []
-    it = QtCore.QDirIterator(":", QtCore.QDirIterator.Subdirectories)
-
-    while it.hasNext():
-        f = it.next()
-        if "index.theme" in f:
-            files.append(f)
-
-    for f in files:
-        name = None
-        text = QtCore.QFile(f)
-        text.open(QtCore.QIODevice.ReadOnly | QtCore.QIODevice.Text)
-        while not text.atEnd():
-            line = text.readLine()
-            if "Name=" in str(line):
-                name = str(line)
-                name = name.replace("\n", "")
-                name = name.replace("Name=", "")
-        text.close()
-        folder = f.split("/")
-        folder = folder[-2]
-        names.append([name, folder])
-
-    return names
+    """Icon themes names and folders from the theme catalog.
+
+    Themes of enabled resource files are listed even if the files are
+    not registered.
+    """
+    path = iconThemesPath()
+    return IconThemesCatalog.names([os.path.join(path, f)
+                                    for f in enabledFiles()])
 
 
+@IconThemesStats.instrument("setThemeName")
 def setThemeName(name):
-    """Set icon theme name."""
+    """Set icon theme name.
+
+    Overlays (the legacy theme folder served as icon theme) get the name
+    and can return the name of a theme inheriting it, that one is set.
+    """
+    for key in sorted(overlays):
+        name = overlays[key](name) or name
+
     QtGui.QIcon.setThemeName(name)
     App.Console.PrintLog("Icon themes: set theme name" +
                          " " +
@@ -120,6 +236,68 @@ def setThemeName(name):
                          ".\n")
 
 
+def commandPixmap(name):
+    """Pixmap name of a FreeCAD command or None."""
+    try:
+        pixmap = Gui.Command.get(name).getInfo()["pixmap"]
+    except (AttributeError, KeyError, TypeError, RuntimeError):
+        return None
+
+    if pixmap:
+        return os.path.splitext(os.path.basename(pixmap))[0]
+    return None
+
+
+def coverage(path):
+    """Coverage of the main window actions by the themes of a resource file.
+
+    Icons are looked up by command pixmap name, actions sharing an
+    object name are themed too. Icons of registered themes the themes
+    inherit count as covered.
+    """
+    actions = {}
+    for name in IconThemesActions.collect(mw):
+        actions[name] = commandPixmap(name) or name
+
+    inherited = set()
+    entry = IconThemesCatalog.inspect(path)
+    for theme in (entry["themes"] if entry else []):
+        for folder in theme["inherits"]:
+            inherited.update(IconThemesCatalog.iconNames(folder))
+
+    return IconThemesCoverage.analyze(actions,
+                                      IconThemesCoverage.themeIcons(path),
+                                      inherited=frozenset(inherited))
+
+
+def exportCoverage(parent, result, name):
+    """Ask for a file name and write a coverage result."""
+    path = QtGui.QFileDialog.getSaveFileName(parent,
+                                             "Export coverage",
+                                             name + ".csv",
+                                             "CSV (*.csv);;JSON (*.json)")
+    if isinstance(path, tuple):
+        path = path[0]
+
+    if path:
+        try:
+            IconThemesCoverage.write(result, path)
+        except (IOError, OSError) as e:
+            App.Console.PrintWarning("Icon themes: coverage export failed (" +
+                                     str(e) +
+                                     ").\n")
+
+
+def placeholder(widget):
+    """Replace list widget contents with a loading placeholder."""
+    widget.blockSignals(True)
+    widget.clear()
+    item = QtGui.QListWidgetItem(widget)
+    item.setText("Loading...")
+    item.setFlags(QtCore.Qt.NoItemFlags)
+    widget.blockSignals(False)
+
+
 def prefDialog():
     """Preferences dialog."""
 
@@ -129,6 +307,10 @@ def prefDialog():
 
     def onFinished():
         """Delete dialog on close."""
+        try:
+            watcher.changed.disconnect(onChanged)
+        except (RuntimeError, TypeError):
+            pass
         dialog.deleteLater()
 
     dialog = QtGui.QDialog(mw)
@@ -166,10 +348,15 @@ def prefDialog():
     layoutCenter.insertLayout(0, layoutCenterRegister)
     layoutCenter.insertLayout(1, layoutCenterSet)
 
+    buttonCoverage = QtGui.QPushButton("C&overage...", dialog)
+    buttonCoverage.setToolTip("Export the command coverage of the "
+                              "selected resource")
+
     buttonClose = QtGui.QPushButton("&Close", dialog)
     buttonClose.setDefault(True)
 
     layoutBottom = QtGui.QHBoxLayout()
+    layoutBottom.addWidget(buttonCoverage)
     layoutBottom.addStretch(1)
     layoutBottom.addWidget(buttonClose)
 
@@ -179,18 +366,37 @@ def prefDialog():
     dialog.finished.connect(onFinished)
     buttonClose.clicked.connect(onAccepted)
 
+    tasks = {}
+
+    def background(name, function, callback, widget):
+        """Show a placeholder and fill the widget in the background."""
+        if name in tasks:
+            tasks[name].cancel()
+        placeholder(widget)
+        tasks[name] = IconThemesWorker.start(function, (), callback, dialog)
+
+    def scanRegister():
+        """List resource files with labels (worker thread)."""
+        files = []
+        for f in iconThemesFiles():
+            files.append([f, resourceLabel(f)])
+        return files
+
     def updateRegister():
         """Update register list widget."""
-        files = iconThemesFiles()
+        background("register", scanRegister, fillRegister, register)
+
+    def fillRegister(files):
+        """Fill register list widget."""
         enabled = p.GetString("Registered")
         enabled = enabled.split(",")
 
         register.blockSignals(True)
         register.clear()
 
-        for f in files:
+        for f, label in files:
             item = QtGui.QListWidgetItem(register)
-            item.setText(f)
+            item.setText(label)
             item.setData(32, f)
             if f in enabled:
                 item.setCheckState(QtCore.Qt.Checked)
@@ -205,24 +411,35 @@ def prefDialog():
         """Register or unregister resource."""
         enabled = []
 
-        if item.checkState() == QtCore.Qt.Checked:
-            registerResource(item.data(32))
-        else:
-            registerResource(item.data(32), False)
-
         for index in range(register.count()):
             if register.item(index).checkState() == QtCore.Qt.Checked:
                 enabled.append(register.item(index).data(32))
 
         p.SetString("Registered", ",".join(enabled))
+        useTheme(p.GetString("Theme", "FreeCAD-default"))
         updateSetTheme()
 
     register.itemChanged.connect(onRegister)
 
+    def onCoverage():
+        """Export the coverage of the selected resource file."""
+        item = register.currentItem()
+        if item is None:
+            return
+
+        name = item.data(32)
+        exportCoverage(dialog,
+                       coverage(iconThemesPath() + name),
+                       os.path.splitext(name)[0] + "-coverage")
+
+    buttonCoverage.clicked.connect(onCoverage)
+
     def updateSetTheme():
         """Update icon themes list widget."""
-        names = iconThemesNames()
+        background("theme", iconThemesNames, fillSetTheme, setTheme)
 
+    def fillSetTheme(names):
+        """Fill icon themes list widget."""
         setTheme.blockSignals(True)
         setTheme.clear()
 
@@ -244,6 +461,7 @@ def prefDialog():
                 if setTheme.item(index).data(32) == "FreeCAD-default":
                     setTheme.item(index).setCheckState(QtCore.Qt.Checked)
                     p.SetString("Theme", "FreeCAD-default")
+                    useTheme("FreeCAD-default")
                     setThemeName("FreeCAD-default")
 
         setTheme.blockSignals(False)
@@ -276,10 +494,18 @@ def prefDialog():
         else:
             p.RemString("Theme")
 
+        useTheme(name)
         setThemeName(name)
 
     setTheme.itemChanged.connect(onSetTheme)
 
+    def onChanged(change):
+        """Refresh the lists when resource files change."""
+        updateRegister()
+        updateSetTheme()
+
+    watcher.changed.connect(onChanged)
+
     return dialog
 
 
@@ -289,23 +515,88 @@ def onPreferences():
     dialog.show()
 
 
+def themeManifest():
+    """Startup manifest of the icon theme if still valid, or None."""
+    entry = IconThemesManifest.get("theme")
+
+    if (entry and
+            entry.get("requested") == p.GetString("Theme",
+                                                  "FreeCAD-default") and
+            entry.get("registered") == p.GetString("Registered")):
+        return entry
+    return None
+
+
+def saveThemeManifest(requested, name):
+    """Record the resolved icon theme in the startup manifest."""
+    path = iconThemesPath()
+    fingerprints = {path: IconThemesCatalog.fingerprint(path)}
+
+    for f in enabledFiles():
+        fingerprints[path + f] = IconThemesCatalog.fingerprint(path + f)
+
+    IconThemesManifest.put("theme", {
+        "requested": requested,
+        "registered": p.GetString("Registered"),
+        "theme": name,
+        "files": sorted(users.get("theme", [])),
+        "fingerprints": fingerprints})
+
+
 def registerOnStart():
-    """Register enabled resources on FreeCAD start."""
-    files = iconThemesFiles()
-    enabled = p.GetString("Registered")
-    enabled = enabled.split(",")
+    """Register resources needed by the icon theme on FreeCAD start."""
+    entry = themeManifest()
 
-    for f in files:
-        if f in enabled:
-            registerResource(f)
+    if entry:
+        useResources("theme", entry["files"])
+    else:
+        useTheme(p.GetString("Theme", "FreeCAD-default"))
 
 
 def setThemeOnStart():
     """Set enabled icon theme on FreeCAD start."""
-    name = p.GetString("Theme", "FreeCAD-default")
+    entry = themeManifest()
+
+    if entry:
+        setThemeName(entry["theme"])
+        return
+
+    requested = p.GetString("Theme", "FreeCAD-default")
+    name = requested
+
+    if name not in [n[1] for n in iconThemesNames()]:
+        name = "FreeCAD-default"
+        useTheme(name)
+
+    saveThemeManifest(requested, name)
     setThemeName(name)
 
 
+def onIconsChanged(change):
+    """Re-register changed resource files and reload the theme."""
+    enabled = p.GetString("Registered").split(",")
+    names = sorted(i for i in change.names() if i in enabled)
+
+    for f in names:
+        if f in change.removed:
+            forgetResource(f)
+        elif f in change.modified and f in resources:
+            registerResource(f, False)
+            registerResource(f)
+
+    if names:
+        registerOnStart()
+        setThemeOnStart()
+
+
+def watchOnStart():
+    """Watch the icon themes folder for resource file changes."""
+    if IconThemesWatcher.enabled():
+        watcher.watch(iconThemesPath(),
+                      (".rcc", IconThemesStore.EXTENSION))
+        watcher.changed.connect(onIconsChanged)
+
+
 def accessoriesMenu():
     """Add icon themes preferences to accessories menu."""
     pref = QtGui.QAction(mw)
@@ -339,25 +630,8 @@ def accessoriesMenu():
             mw.workbenchActivated.connect(addMenu)
 
 
-def onStart():
-    """Start the icon themes."""
-    timer.stop()
-    timer.deleteLater()
-    accessoriesMenu()
-
-
-def onPreStart():
-    """Improve start reliability and maintain FreeCAD 0.16 support."""
-    if App.Version()[1] < "17":
-        onStart()
-    else:
-        if mw.property("eventLoop"):
-            onStart()
-
-
-registerOnStart()
-setThemeOnStart()
-
-timer = QtCore.QTimer()
-timer.timeout.connect(onPreStart)
-timer.start(500)
+IconThemesStartup.run("scan", IconThemesCatalog.load)
+IconThemesStartup.run("register", registerOnStart)
+IconThemesStartup.run("theme", setThemeOnStart)
+IconThemesStartup.schedule("menu", accessoriesMenu)
+IconThemesStartup.schedule("watch", watchOnStart)
@@ -0,0 +1,306 @@
+# Icon themes for FreeCAD
+# Copyright (C) 2016, 2017, 2018, 2019 triplus @ FreeCAD
+#
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+
+"""Icon theme (index.theme) parser.
+
+Implements the freedesktop.org icon theme specification: theme
+metadata, per-directory size matching and the Inherits chain. Pure
+Python, no Qt required.
+"""
+
+
+EXTENSIONS = (".svg", ".png", ".xpm")
+
+
+class Directory(object):
+    """Icon theme directory (subdirectory section)."""
+
+    __slots__ = ("name", "size", "scale", "context", "type",
+                 "minSize", "maxSize", "threshold")
+
+    def __init__(self, name, keys):
+        self.name = name
+        self.size = toInt(keys.get("Size"), 0)
+        self.scale = toInt(keys.get("Scale"), 1)
+        self.context = keys.get("Context", "")
+        self.type = keys.get("Type", "Threshold")
+        self.minSize = toInt(keys.get("MinSize"), self.size)
+        self.maxSize = toInt(keys.get("MaxSize"), self.size)
+        self.threshold = toInt(keys.get("Threshold"), 2)
+
+    def matches(self, size, scale=1):
+        """True if the directory matches the icon size exactly."""
+        if self.scale != scale:
+            return False
+        if self.type == "Fixed":
+            return self.size == size
+        elif self.type == "Scalable":
+            return self.minSize <= size <= self.maxSize
+        else:
+            return (self.size - self.threshold <=
+                    size <=
+                    self.size + self.threshold)
+
+    def distance(self, size, scale=1):
+        """Distance between the directory and the icon size."""
+        wanted = size * scale
+        if self.type == "Fixed":
+            return abs(self.size * self.scale - wanted)
+        elif self.type == "Scalable":
+            low = self.minSize * self.scale
+            high = self.maxSize * self.scale
+        else:
+            low = (self.size - self.threshold) * self.scale
+            high = (self.size + self.threshold) * self.scale
+        if wanted < low:
+            return low - wanted
+        if wanted > high:
+            return wanted - high
+        return 0
+
+
+class Theme(object):
+    """Parsed icon theme."""
+
+    def __init__(self, folder, keys, directories):
+        self.folder = folder
+        self.name = keys.get("Name")
+        self.comment = keys.get("Comment", "")
+        self.hidden = keys.get("Hidden", "false").lower() == "true"
+        self.example = keys.get("Example", "")
+        self.inherits = toList(keys.get("Inherits"))
+        self.directories = directories
+
+    def __repr__(self):
+        return "<Theme " + str(self.folder) + " " + repr(self.name) + ">"
+
+
+def toInt(value, default):
+    """Parse an integer value."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def toList(value):
+    """Parse a comma separated list value."""
+    if not value:
+        return []
+    return [i.strip() for i in value.split(",") if i.strip()]
+
+
+def sections(text):
+    """Split desktop entry text into {section: {key: value}}."""
+    result = {}
+    current = None
+
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if line.startswith("[") and line.endswith("]"):
+            current = result.setdefault(line[1:-1], {})
+        elif current is not None and "=" in line:
+            key, value = line.split("=", 1)
+            current[key.strip()] = value.strip()
+
+    return result
+
+
+def parse(text, folder=None):
+    """Parse index.theme contents, return a Theme or None."""
+    if isinstance(text, bytes):
+        text = text.decode("UTF-8", "replace")
+
+    data = sections(text)
+    keys = data.get("Icon Theme")
+    if keys is None or not keys.get("Name"):
+        return None
+
+    directories = []
+    for name in (toList(keys.get("Directories")) +
+                 toList(keys.get("ScaledDirectories"))):
+        if name in data:
+            directories.append(Directory(name, data[name]))
+
+    return Theme(folder, keys, directories)
+
+
+def validate(text):
+    """Problems of index.theme contents, an empty list if valid."""
+    if isinstance(text, bytes):
+        try:
+            text = text.decode("UTF-8")
+        except UnicodeDecodeError:
+            return ["not UTF-8 encoded"]
+
+    problems = []
+    data = sections(text)
+    keys = data.get("Icon Theme")
+
+    if keys is None:
+        return ["missing [Icon Theme] section"]
+
+    if not keys.get("Name"):
+        problems.append("missing Name")
+    if not keys.get("Comment"):
+        problems.append("missing Comment")
+
+    names = (toList(keys.get("Directories")) +
+             toList(keys.get("ScaledDirectories")))
+    if not names:
+        problems.append("no Directories")
+
+    for name in names:
+        if name not in data:
+            problems.append("directory " + name + " has no section")
+            continue
+        d = data[name]
+        if toInt(d.get("Size"), None) is None:
+            problems.append("directory " + name + " has no valid Size")
+        if d.get("Type", "Threshold") not in ("Fixed",
+                                              "Scalable",
+                                              "Threshold"):
+            problems.append("directory " + name + " has unknown Type " +
+                            d.get("Type"))
+        for key in ("Scale", "MinSize", "MaxSize", "Threshold"):
+            if key in d and toInt(d[key], None) is None:
+                problems.append("directory " + name + " has invalid " + key)
+        if toInt(d.get("MinSize"), 0) > toInt(d.get("MaxSize"), 1 << 30):
+            problems.append("directory " + name + " has MinSize > MaxSize")
+
+    return problems
+
+
+def chain(folder, inherits):
+    """Theme folder followed by all inherited theme folders.
+
+    inherits(folder) returns the inherited folders of a theme or None
+    if the theme is unknown, unknown themes are left out.
+    """
+    result = []
+    pending = [folder]
+
+    while pending:
+        current = pending.pop(0)
+        if current in result:
+            continue
+        parents = inherits(current)
+        if parents is None:
+            continue
+        result.append(current)
+        pending.extend(parents)
+
+    return result
+
+
+class Themes(object):
+    """Cached theme lookup over a storage.
+
+    read(folder, name) returns the contents of a theme file or None,
+    listDir(folder, directory) returns file names inside a theme
+    directory. Parsed themes, inheritance chains and icon lookup tables
+    are kept until clear() is called.
+    """
+
+    def __init__(self, read, listDir):
+        self.read = read
+        self.listDir = listDir
+        self.themes = {}
+        self.chains = {}
+        self.tables = {}
+        self.resolved = {}
+
+    def clear(self):
+        """Forget everything, e.g. after the storage changed."""
+        self.themes.clear()
+        self.chains.clear()
+        self.tables.clear()
+        self.resolved.clear()
+
+    def theme(self, folder):
+        """Parsed theme of a folder or None."""
+        if folder not in self.themes:
+            text = self.read(folder, "index.theme")
+            if text is None:
+                self.themes[folder] = None
+            else:
+                self.themes[folder] = parse(text, folder)
+        return self.themes[folder]
+
+    def inherits(self, folder):
+        """Inherited theme folders or None for an unknown theme."""
+        theme = self.theme(folder)
+        if theme is None:
+            return None
+        return theme.inherits
+
+    def chain(self, folder):
+        """Theme folder followed by all inherited theme folders."""
+        if folder not in self.chains:
+            self.chains[folder] = chain(folder, self.inherits)
+        return self.chains[folder]
+
+    def table(self, folder):
+        """Return {icon name: [(Directory, file name)]} of one theme."""
+        if folder not in self.tables:
+            table = {}
+            theme = self.theme(folder)
+            for directory in (theme.directories if theme else []):
+                for f in self.listDir(folder, directory.name):
+                    stem, ext = f[:-4], f[-4:]
+                    if ext in EXTENSIONS:
+                        table.setdefault(stem, []).append((directory, f))
+            self.tables[folder] = table
+        return self.tables[folder]
+
+    def names(self, folder):
+        """Icon names of a theme and the themes it inherits."""
+        result = set()
+        for theme in self.chain(folder):
+            result.update(self.table(theme))
+        return frozenset(result)
+
+    def resolve(self, folder, icon, size=64, scale=1):
+        """Return (theme folder, directory, file) of an icon or None.
+
+        The first theme of the chain having the icon wins, in it the
+        directory matching the size or else the closest one.
+        """
+        key = (folder, icon, size, scale)
+
+        if key not in self.resolved:
+            result = None
+            for theme in self.chain(folder):
+                entries = self.table(theme).get(icon)
+                if not entries:
+                    continue
+                best = None
+                for directory, f in entries:
+                    if directory.matches(size, scale):
+                        best = (0, directory, f)
+                        break
+                    distance = directory.distance(size, scale)
+                    if best is None or distance < best[0]:
+                        best = (distance, directory, f)
+                result = (theme, best[1].name, best[2])
+                break
+            self.resolved[key] = result
+
+        return self.resolved[key]
@@ -23,42 +23,55 @@ def iconThemes():
     """Icon themes for FreeCAD."""
 
     import os
+    import filecmp
+    import threading
     import FreeCADGui as Gui
     import FreeCAD as App
     from PySide import QtGui
     from PySide import QtCore
+    import IconThemesActions
+    import IconThemesCache
+    import IconThemesCatalog
+    import IconThemesCoverage
+    import IconThemesGui
+    import IconThemesManifest
+    import IconThemesStartup
+    import IconThemesStats
+    import IconThemesStore
+    import IconThemesWatcher
+    import IconThemesZip
+    import IconThemesWorker
+    import IconThemesPreview
+    import IconThemesRcc
 
     mw = Gui.getMainWindow()
-
-    appliedIcons = []
-    defaultIcons = {}
+    registry = IconThemesActions.ActionRegistry(mw)
+    watcher = IconThemesWatcher.Watcher(mw)
+
+    appliedIcons = set()
+    appliedGeneration = [None]
+    themedIcons = {}
+    defaultIcons = IconThemesActions.DefaultIcons(lambda i: deriveIcon(i))
+    iconIndexes = {}
+    indexLock = threading.RLock()
+    indexGeneration = [0]
+    themeResource = []
+    themeBase = []
+    themeUnresolved = set()
 
     noneIcon = QtGui.QIcon(":/icons/freecad")
 
     paramGet = App.ParamGet("User parameter:BaseApp/IconThemes")
+    themeBase.append(QtGui.QIcon.themeName() or
+                     paramGet.GetString("Theme", "FreeCAD-default"))
 
+    @IconThemesStats.instrument("actionList")
     def actionList():
         """
         Create a dictionary of unique actions.
         """
-        actions = {}
-        duplicates = []
-
-        for i in mw.findChildren(QtGui.QAction):
-            if i.objectName() and i.text():
-                if i.objectName() in actions:
-                    if i.objectName() not in duplicates:
-                        duplicates.append(i.objectName())
-                    else:
-                        pass
-                else:
-                    actions[i.objectName()] = i
-            else:
-                pass
-
-        for d in duplicates:
-            del actions[d]
-
+        actions = registry.actions()
+        IconThemesStats.count("actionList", actions=len(actions))
         return actions
 
     def themeFolders():
@@ -74,7 +87,12 @@ def iconThemes():
 
         if os.path.isdir(path):
             for i in os.listdir(path):
-                if os.path.isdir(path + i):
+                if (os.path.isdir(path + i) or
+                        IconThemesZip.isArchive(path + i)):
+                    folders.append(i.encode("UTF-8"))
+                elif (i.endswith(IconThemesStore.EXTENSION) and
+                        IconThemesStore.load(path + i).get("kind") ==
+                        "legacy"):
                     folders.append(i.encode("UTF-8"))
                 else:
                     pass
@@ -101,72 +119,567 @@ def iconThemes():
                     os.path.sep +
                     folder +
                     os.path.sep)
-            if os.path.isdir(path):
+            if (os.path.isdir(path) or
+                    IconThemesZip.isArchive(path) or
+                    IconThemesStore.isManifest(path)):
                 return path
             else:
                 return False
         else:
             return False
 
-    def themeIcons():
+    @IconThemesStats.instrument("iconIndex")
+    def iconIndex(path):
+        """
+        Create a set of icon names available in a theme folder.
+
+        Also used from worker threads, the index is read without holding
+        the lock and only kept if no index was forgotten meanwhile.
+        """
+        with indexLock:
+            index = iconIndexes.get(path)
+            generation = indexGeneration[0]
+
+        if index is None:
+            index = scanIndex(path)
+            with indexLock:
+                if generation == indexGeneration[0]:
+                    index = iconIndexes.setdefault(path, index)
+                else:
+                    pass
+        else:
+            pass
+
+        return index
+
+    def forgetIndex(path=None):
+        """
+        Forget the icon index of a theme folder, or of all folders.
+        """
+        with indexLock:
+            indexGeneration[0] += 1
+            if path is None:
+                iconIndexes.clear()
+            else:
+                iconIndexes.pop(path, None)
+
+    def scanIndex(path):
+        """
+        Read the icon names of a theme folder, archive or manifest.
+        """
+        if IconThemesZip.isArchive(path):
+            return IconThemesZip.names(path)
+        elif IconThemesStore.isManifest(path):
+            return IconThemesStore.names(path)
+        else:
+            names = []
+            files = 0
+
+            try:
+                for i in os.scandir(path):
+                    files += 1
+                    if i.name.endswith(".svg") and i.is_file():
+                        names.append(i.name[:-4])
+                    else:
+                        pass
+            except OSError:
+                pass
+
+            IconThemesStats.count("iconIndex", files=files)
+
+            return frozenset(names)
+
+    def iconSource(path, name):
+        """
+        Icon file of a theme folder, archive or icon store manifest.
+        """
+        if path.rstrip(os.path.sep).endswith(IconThemesStore.EXTENSION):
+            return IconThemesStore.source(IconThemesCatalog.storePath(),
+                                          path,
+                                          name)
+        else:
+            return path + name + ".svg"
+
+    def themeBackend():
+        """
+        Serve theme folders as a QIcon theme instead of per action icons.
+        """
+        return paramGet.GetString("LegacyBackend") == "theme"
+
+    def coverage(path):
+        """
+        Coverage of the command set by a theme folder or archive.
+        """
+        actions = {}
+        icons = iconIndex(path)
+
+        for i in actionList():
+            if i in icons or not themeBackend():
+                actions[i] = i
+            else:
+                actions[i] = IconThemesGui.commandPixmap(i) or i
+
+        if themeBackend():
+            return IconThemesCoverage.analyze(
+                actions,
+                icons,
+                inherited=IconThemesCatalog.iconNames(themeBase[0]))
+        else:
+            return IconThemesCoverage.analyze(actions,
+                                              icons,
+                                              registry.duplicates)
+
+    def deriveIcon(name):
+        """
+        Default icon of a command from the FreeCAD bitmap factory, or
+        from the icon theme set in the preferences, or None.
+        """
+        pixmap = IconThemesGui.commandPixmap(name)
+
+        if pixmap:
+            try:
+                icon = Gui.getIcon(pixmap)
+            except (AttributeError, TypeError, RuntimeError):
+                icon = None
+            if icon and not icon.isNull():
+                return icon
+            else:
+                pass
+            source = IconThemesCatalog.resolve(pixmap, 64, themeBase[0])
+            if source and source.endswith(".svg"):
+                return IconThemesCache.icon(source)
+            elif source:
+                return QtGui.QIcon(source)
+            else:
+                pass
+        else:
+            pass
+
+        return None
+
+    def derivable(action):
+        """
+        Default icon of an action is the command pixmap. Checkable
+        actions and command groups can show another icon, theirs is
+        kept.
+        """
+        return (not action.isCheckable() and
+                action.menu() is None and
+                IconThemesGui.commandPixmap(action.objectName()) is not None)
+
+    def themeIcon(action, source):
+        """
+        Set the shared icon of a source, remember the default icon.
+        """
+        name = action.objectName()
+        if name not in defaultIcons:
+            defaultIcons.store(name, action.icon(), derivable(action))
+        else:
+            pass
+        themedIcons[name] = source
+        action.setIcon(IconThemesCache.sharedIcon(source))
+
+    def restoreIcon(action):
+        """
+        Set the default icon of a themed action again.
+        """
+        name = action.objectName()
+        themedIcons.pop(name, None)
+
+        if name in defaultIcons:
+            action.setIcon(defaultIcons.pop(name))
+        else:
+            pass
+
+    def footprint():
+        """
+        Number of actions and icons held by the legacy module.
+        """
+        result = defaultIcons.footprint()
+        result["actions"] = len(appliedIcons)
+        result["themed"] = len(themedIcons)
+        result["sources"] = len(set(themedIcons.values()))
+        return result
+
+    IconThemesStats.footprints["legacy"] = footprint
+
+    def unregisterTheme():
+        """
+        Unregister the resource serving a theme folder.
+        """
+        if themeResource:
+            QtCore.QResource.unregisterResourceData(themeResource[0])
+            del themeResource[:]
+            IconThemesCatalog.forget()
+        else:
+            pass
+
+    def overlayTheme(base):
+        """
+        Theme of the current theme folder inheriting the icon theme base.
+
+        Icons are stored under the action name and under the command
+        pixmap name in an in-memory resource. Registered as overlay of
+        IconThemesGui, every icon theme set there is overlaid. Icons
+        whose command did not exist yet are remembered as unresolved.
+        """
+        themeBase[0] = base
+        path = currentFolder()
+
+        if not themeBackend() or not path:
+            unregisterTheme()
+            return None
+        elif themeResource and themeResource[1:] == [path, base]:
+            return themeResource[3]
+        else:
+            unregisterTheme()
+
+        name = "Legacy-" + os.path.basename(os.path.normpath(path))
+        prefix = "/icons/" + name + "/"
+        files = {prefix + "index.theme": ("[Icon Theme]\n"
+                                          "Name=" + name + "\n"
+                                          "Inherits=" + base + "\n"
+                                          "Hidden=true\n"
+                                          "Directories=scalable\n\n"
+                                          "[scalable]\n"
+                                          "Size=64\n"
+                                          "Type=Scalable\n"
+                                          "MinSize=1\n"
+                                          "MaxSize=512\n").encode("UTF-8")}
+        themeUnresolved.clear()
+
+        for i in iconIndex(path):
+            data = IconThemesCache.readSource(iconSource(path, i))
+            if not data:
+                continue
+            else:
+                pass
+            files[prefix + "scalable/" + i + ".svg"] = data
+            pixmap = IconThemesGui.commandPixmap(i)
+            if pixmap is None:
+                themeUnresolved.add(i)
+            elif pixmap != i:
+                files[prefix + "scalable/" + pixmap + ".svg"] = data
+            else:
+                pass
+
+        data = IconThemesRcc.build(files, threshold=0)
+
+        if QtCore.QResource.registerResourceData(data):
+            themeResource.extend([data, path, base, name])
+            IconThemesCatalog.forget()
+            if ":/icons" not in QtGui.QIcon.themeSearchPaths():
+                QtGui.QIcon.setThemeSearchPaths(
+                    QtGui.QIcon.themeSearchPaths() + [":/icons"])
+            else:
+                pass
+            return name
+        else:
+            App.Console.PrintWarning("Icon themes: unable to register " +
+                                     name +
+                                     ".\n")
+            return None
+
+    IconThemesGui.overlays["legacy"] = overlayTheme
+
+    def registerTheme():
+        """
+        Serve the current theme folder as a QIcon theme (rebuilt).
+        """
+        unregisterTheme()
+        IconThemesGui.setThemeName(themeBase[0])
+
+    def refreshTheme():
+        """
+        Rebuild the theme when added commands use another pixmap name.
+        """
+        if not themeUnresolved:
+            return
+        else:
+            pass
+
+        actions = actionList()
+
+        if registry.generation == appliedGeneration[0]:
+            return
+        else:
+            appliedGeneration[0] = registry.generation
+
+        rebuild = False
+        for i in themeUnresolved & actions.keys():
+            themeUnresolved.discard(i)
+            pixmap = IconThemesGui.commandPixmap(i)
+            if pixmap and pixmap != i:
+                rebuild = True
+            else:
+                pass
+
+        if rebuild:
+            registerTheme()
+        else:
+            pass
+
+    def manifestIndex(path):
+        """
+        Use the icon index of a theme folder from the startup manifest.
+        """
+        with indexLock:
+            if path in iconIndexes:
+                return
+            else:
+                pass
+
+        entry = IconThemesManifest.get("legacy")
+
+        if entry and entry.get("folder") == path:
+            with indexLock:
+                iconIndexes.setdefault(path, frozenset(entry["icons"]))
+        else:
+            pass
+
+    def saveManifest(path):
+        """
+        Record the icon index of a theme folder in the startup manifest.
+        Archives and installed themes are files, their paths end with a
+        separator too.
+        """
+        target = path.rstrip("/" + os.path.sep)
+
+        IconThemesManifest.put("legacy", {
+            "folder": path,
+            "fingerprints": {target: IconThemesCatalog.fingerprint(target)},
+            "icons": sorted(iconIndex(path))})
+
+    def themeIcons(path=None):
         """
         Create a list of theme icons.
         """
         icons = []
-        path = currentFolder()
+        if path is None:
+            path = currentFolder()
+        else:
+            pass
 
         if path:
-            for i in os.listdir(path):
-                if os.path.isfile(path + i) and i.endswith(".svg"):
-                    icons.append(path + i)
-                else:
-                    pass
+            for i in iconIndex(path):
+                icons.append(iconSource(path, i))
         else:
             pass
 
         return icons
 
-    def resetIcons():
+    @IconThemesStats.instrument("resetIcons")
+    def resetIcons(names=None):
         """
-        Set default theme icons.
+        Set default theme icons (of all or only the named actions).
         """
         actions = actionList()
+        touched = 0
 
-        for i in actions:
-            if i in defaultIcons:
-                actions[i].setIcon(defaultIcons[i])
+        if names is None:
+            names = list(defaultIcons)
+        else:
+            pass
+
+        for i in names:
+            if i in actions and i in defaultIcons:
+                restoreIcon(actions[i])
+                touched += 1
             else:
                 pass
 
+        IconThemesStats.count("resetIcons", actions=touched)
+
+    @IconThemesStats.instrument("applyIcons")
     def applyIcons():
         """
         Apply the icons from the currently set icon theme.
+
+        Only actions not seen before are considered. Nothing is compared
+        if no action was added since the last call (a workbench that was
+        activated before).
         """
         path = currentFolder()
+
+        if themeBackend():
+            return
+        else:
+            pass
+
         actions = actionList()
 
-        if path:
-            for i in actions:
-                name = actions[i].objectName()
+        if path and registry.generation == appliedGeneration[0]:
+            pass
+        elif path:
+            appliedGeneration[0] = registry.generation
+            manifestIndex(path)
+            new = actions.keys() - appliedIcons
+            appliedIcons.update(new)
+            themed = new & iconIndex(path)
+            IconThemesStats.count("applyIcons", actions=len(themed))
+
+            for name in themed:
+                themeIcon(actions[name], iconSource(path, name))
+
+            if themed and IconThemesWatcher.enabled():
+                watcher.watchFiles(path, themedFiles(path, themed))
+            else:
+                pass
 
-                if name not in defaultIcons:
-                    defaultIcons[name] = actions[i].icon()
-                else:
-                    pass
+            if new:
+                saveManifest(path)
+            else:
+                pass
+        else:
+            pass
+
+    def watchFolder():
+        """
+        Watch the current icon theme folder. Archives and installed
+        themes (.icons) are files and are not watched.
+        """
+        watcher.clear()
+        path = currentFolder()
 
-                if name not in appliedIcons:
-                    icon = path + name + ".svg"
+        if path and IconThemesWatcher.enabled():
+            watcher.watch(path, (".svg",), themedFiles(path))
+        else:
+            pass
 
-                    if os.path.isfile(icon):
-                        actions[i].setIcon(QtGui.QIcon(icon))
+    def themedFiles(path, names=None):
+        """
+        File names of themed icons inside a theme folder, these are
+        watched for changes made in place.
+        """
+        if names is None:
+            names = themedIcons.keys()
+        else:
+            pass
+
+        files = []
+        for name in names:
+            if themedIcons.get(name) == path + name + ".svg":
+                files.append(name + ".svg")
+            else:
+                pass
+
+        return files
+
+    def onFolderChanged(change):
+        """
+        Update the actions whose icons changed in the theme folder.
+        """
+        path = currentFolder()
+
+        if path and os.path.normpath(path) == change.path:
+            forgetIndex(path)
+
+            if themeBackend():
+                registerTheme()
+                return
+            else:
+                pass
+
+            actions = actionList()
+
+            for f in change.names():
+                name = f[:-4]
+                IconThemesCache.forget(path + f)
+                if name in actions and name in appliedIcons:
+                    if f in change.removed:
+                        restoreIcon(actions[name])
                     else:
-                        pass
-                    appliedIcons.append(name)
+                        themeIcon(actions[name], path + f)
                 else:
                     pass
         else:
             pass
 
+    def sameIcon(old, new, name):
+        """
+        Icon files in two theme folders have the same content.
+        """
+        a = iconSource(old, name)
+        b = iconSource(new, name)
+
+        if a == b:
+            # The same file of the icon store.
+            return True
+        elif IconThemesZip.split(a) or IconThemesZip.split(b):
+            return (IconThemesCache.readSource(a) ==
+                    IconThemesCache.readSource(b))
+        else:
+            pass
+
+        try:
+            return filecmp.cmp(a, b, False)
+        except OSError:
+            return False
+
+    def suspendUpdates(suspend):
+        """
+        Suspend or resume repainting of the main window and toolbars.
+        """
+        for i in [mw] + mw.findChildren(QtGui.QToolBar):
+            i.setUpdatesEnabled(not suspend)
+
+    @IconThemesStats.instrument("switchIcons")
+    def switchIcons(old, new):
+        """
+        Switch theme folders, only actions whose icon changes are updated.
+        """
+        actions = actionList()
+
+        if old:
+            themed = iconIndex(old) & appliedIcons
+        else:
+            themed = frozenset()
+
+        forgetIndex()
+
+        if new:
+            available = iconIndex(new)
+        else:
+            available = frozenset()
+
+        update = []
+        same = []
+        for name in available & actions.keys():
+            if name in themed and sameIcon(old, new, name):
+                same.append(name)
+            else:
+                update.append(name)
+
+        appliedIcons.update(actions.keys())
+        IconThemesStats.count("switchIcons", actions=len(update))
+
+        suspendUpdates(True)
+        try:
+            resetIcons(themed - available)
+
+            for name in update:
+                themeIcon(actions[name], iconSource(new, name))
+        finally:
+            suspendUpdates(False)
+
+        # Unchanged icons are kept, but read from the new folder.
+        for name in same:
+            source = iconSource(new, name)
+            current = themedIcons.get(name)
+            if current == source:
+                pass
+            elif current and IconThemesCache.move(current, source):
+                themedIcons[name] = source
+            else:
+                themeIcon(actions[name], source)
+
+        IconThemesCache.prune(set(themedIcons.values()))
+
+        if new:
+            saveManifest(new)
+        else:
+            pass
+
     def onPreferences():
         """
         Open the preferences dialog.
@@ -178,12 +691,38 @@ def iconThemes():
         """
         Preferences dialog.
         """
+        tasks = {}
+
+        def background(name, function, args, callback):
+            """
+            Run a scan in the background, cancel the previous one.
+            """
+            if name in tasks:
+                tasks[name].cancel()
+            else:
+                pass
+            tasks[name] = IconThemesWorker.start(function,
+                                                 args,
+                                                 callback,
+                                                 dialog)
+
         def updateComboBox():
             """
             Update theme folders combobox.
             """
+            comboBox.blockSignals(True)
+            comboBox.clear()
+            comboBox.addItem("Loading...")
+            comboBox.setEnabled(False)
+            comboBox.blockSignals(False)
+
+            background("folders", themeFolders, (), fillComboBox)
+
+        def fillComboBox(folders):
+            """
+            Fill theme folders combobox.
+            """
             default = True
-            folders = themeFolders()
             try:
                 current = paramGet.GetString("ThemeFolder").decode("UTF-8")
             except AttributeError:
@@ -214,12 +753,15 @@ def iconThemes():
             else:
                 pass
 
+            comboBox.setEnabled(True)
             comboBox.blockSignals(False)
 
         def onTheme(index):
             """
             Apply the selected theme.
             """
+            old = currentFolder()
+
             if index != 0:
                 text = comboBox.currentText()
                 try:
@@ -229,55 +771,67 @@ def iconThemes():
             else:
                 paramGet.RemString("ThemeFolder")
 
-            del appliedIcons[:]
-            resetIcons()
-
-            applyIcons()
+            if themeBackend():
+                forgetIndex()
+                registerTheme()
+            else:
+                switchIcons(old, currentFolder())
+            watchFolder()
             updateIconArea()
 
+        @IconThemesStats.instrument("updateIconArea")
         def updateIconArea():
             """
             Update icons in the icon preview area.
             """
-            iconArea.blockSignals(True)
-            iconArea.clear()
+            if "icons" in tasks:
+                tasks.pop("icons").cancel()
+            else:
+                pass
 
             if paramGet.GetBool("DesignerMode"):
-
+                entries = []
                 actions = actionList()
 
                 for i in actions:
-                    item = QtGui.QListWidgetItem()
-                    item.setToolTip(actions[i].toolTip())
-                    item.setData(33, actions[i].objectName())
-                    item.setText(actions[i].text().replace("&", ""))
-
                     if actions[i].icon():
-                        item.setIcon(actions[i].icon())
+                        icon = actions[i].icon()
                     else:
-                        item.setIcon(noneIcon)
+                        icon = noneIcon
 
-                    iconArea.addItem(item)
+                    entries.append(IconThemesPreview.Entry(
+                        text=actions[i].text().replace("&", ""),
+                        toolTip=actions[i].toolTip(),
+                        name=actions[i].objectName(),
+                        icon=icon))
+
+                iconModel.setEntries(entries)
+                IconThemesStats.count("updateIconArea", actions=len(entries))
 
             else:
-                icons = themeIcons()
+                iconModel.setEntries([IconThemesPreview.Entry("Loading...")])
+
+                background("icons", themeIcons, (currentFolder(),), fillIcons)
 
-                for i in icons:
-                    item = QtGui.QListWidgetItem(iconArea)
-                    item.setIcon(QtGui.QIcon(i))
+        def fillIcons(icons):
+            """
+            Fill the icon preview area with theme icons.
+            """
+            entries = []
 
-            iconArea.sortItems(QtCore.Qt.AscendingOrder)
+            for i in icons:
+                entries.append(IconThemesPreview.Entry(source=i))
 
-            iconArea.blockSignals(False)
+            iconModel.setEntries(entries)
 
-        def onSelected():
+        def onSelected(current=None, previous=None):
             """
             Update icon file name on selection.
             """
             if paramGet.GetBool("DesignerMode"):
-                item = iconArea.currentItem()
-                if item:
-                    labelIconName.setText(item.data(33) + ".svg")
+                index = iconArea.currentIndex()
+                if index.isValid() and index.data(33):
+                    labelIconName.setText(index.data(33) + ".svg")
                 else:
                     pass
             else:
@@ -298,16 +852,40 @@ def iconThemes():
 
             updateIconArea()
 
+        def onCoverage():
+            """
+            Export the coverage of the current theme.
+            """
+            path = currentFolder()
+
+            if path:
+                name = os.path.basename(path.rstrip(os.path.sep))
+                IconThemesGui.exportCoverage(dialog,
+                                             coverage(path),
+                                             name + "-coverage")
+            else:
+                pass
+
         def onAccepted():
             """
             Close dialog on button close.
             """
             dialog.done(1)
 
+        def onChanged(change):
+            """
+            Refresh the icon preview area when theme files change.
+            """
+            updateIconArea()
+
         def onFinished():
             """
             Delete dialog on close.
             """
+            try:
+                watcher.changed.disconnect(onChanged)
+            except (RuntimeError, TypeError):
+                pass
             dialog.deleteLater()
 
         def prefDefaults():
@@ -338,19 +916,26 @@ def iconThemes():
         labelIconName = QtGui.QLabel(dialog)
         labelIconName.setTextInteractionFlags(QtCore.Qt.TextSelectableByMouse)
 
-        iconArea = QtGui.QListWidget(dialog)
+        iconModel = IconThemesPreview.IconModel(dialog, 48)
+
+        iconArea = QtGui.QListView(dialog)
         iconArea.setParent(dialog)
         iconArea.setIconSize(QtCore.QSize(48, 48))
         iconArea.setGridSize(QtCore.QSize(108, 96))
-        iconArea.sortItems(QtCore.Qt.AscendingOrder)
         iconArea.setViewMode(QtGui.QListView.IconMode)
         iconArea.setResizeMode(QtGui.QListView.Adjust)
+        iconArea.setUniformItemSizes(True)
+        iconArea.setLayoutMode(QtGui.QListView.Batched)
+        iconArea.setModel(iconModel)
 
         buttonDesignerMode = QtGui.QPushButton("D", dialog)
         buttonDesignerMode.setToolTip("Designer mode")
         buttonDesignerMode.setMaximumWidth(40)
         buttonDesignerMode.setCheckable(True)
 
+        buttonCoverage = QtGui.QPushButton("Coverage...", dialog)
+        buttonCoverage.setToolTip("Export the command coverage of the theme")
+
         buttonClose = QtGui.QPushButton("Close", dialog)
         buttonClose.setDefault(True)
 
@@ -361,6 +946,7 @@ def iconThemes():
 
         layoutBottom = QtGui.QHBoxLayout()
         layoutBottom.addWidget(buttonDesignerMode)
+        layoutBottom.addWidget(buttonCoverage)
         layoutBottom.addStretch(1)
         layoutBottom.addWidget(buttonClose)
 
@@ -372,9 +958,11 @@ def iconThemes():
 
         dialog.finished.connect(onFinished)
         buttonClose.clicked.connect(onAccepted)
+        buttonCoverage.clicked.connect(onCoverage)
         comboBox.currentIndexChanged.connect(onTheme)
-        iconArea.itemSelectionChanged.connect(onSelected)
+        iconArea.selectionModel().currentChanged.connect(onSelected)
         buttonDesignerMode.clicked.connect(onDesignerMode)
+        watcher.changed.connect(onChanged)
 
         return dialog
 
@@ -410,34 +998,33 @@ def iconThemes():
                 addMenu()
                 mw.workbenchActivated.connect(addMenu)
 
+    def onWorkbenchActivated():
+        """
+        Apply the icons to the actions an activated workbench added.
+        """
+        if themeBackend():
+            refreshTheme()
+        else:
+            applyIcons()
+
     def onStart():
         """Start icon themes."""
+        applyIcons()
+        watchFolder()
+        watcher.changed.connect(onFolderChanged)
 
-        start = False
         try:
-            mw.workbenchActivated
-            start = True
+            mw.workbenchActivated.connect(onWorkbenchActivated)
         except AttributeError:
             pass
 
-        if start:
-            timer.stop()
-            timer.deleteLater()
-            accessoriesMenu()
-            applyIcons()
-            mw.workbenchActivated.connect(applyIcons)
-
-    def onPreStart():
-        """Improve start reliability and maintain FreeCAD 0.16 support."""
-        if App.Version()[1] < "17":
-            onStart()
-        else:
-            if mw.property("eventLoop"):
-                onStart()
+    if themeBackend():
+        IconThemesStartup.run("theme", registerTheme)
+    else:
+        pass
 
-    timer = QtCore.QTimer()
-    timer.timeout.connect(onPreStart)
-    timer.start(500)
+    IconThemesStartup.schedule("apply", onStart)
+    IconThemesStartup.schedule("menu", accessoriesMenu)
 
 
 iconThemes()
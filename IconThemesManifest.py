@@ -0,0 +1,123 @@
+# Icon themes for FreeCAD
+# Copyright (C) 2016, 2017, 2018, 2019 triplus @ FreeCAD
+#
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+
+"""Icon themes startup manifest.
+
+Snapshot of what the last session resolved: the icon theme and the
+resource files it needed, the legacy theme folder index and SVG content
+keys. Every section records the fingerprints (modification time and
+size) it depends on. A section is only used while all of its
+fingerprints still match, otherwise it is ignored and rewritten.
+"""
+
+
+import os
+import json
+import FreeCAD as App
+from PySide import QtGui
+import IconThemesCatalog
+
+FORMAT = 1
+
+manifest = {}
+loaded = []
+dirty = []
+
+
+def manifestFile():
+    """Manifest file path."""
+    return IconThemesCatalog.dataPath() + "manifest.json"
+
+
+def load():
+    """Load the manifest from disk (once per session)."""
+    if loaded:
+        return
+    loaded.append(True)
+
+    try:
+        with open(manifestFile(), "r") as f:
+            data = json.load(f)
+    except (IOError, OSError, ValueError):
+        data = {}
+
+    if isinstance(data, dict) and data.get("format") == FORMAT:
+        manifest.update(data)
+
+
+def save():
+    """Write the manifest to disk."""
+    path = IconThemesCatalog.dataPath()
+    manifest["format"] = FORMAT
+
+    try:
+        if not os.path.isdir(path):
+            os.makedirs(path)
+        with open(manifestFile() + ".tmp", "w") as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+        os.replace(manifestFile() + ".tmp", manifestFile())
+    except (IOError, OSError):
+        App.Console.PrintLog("Icon themes: unable to save manifest.\n")
+
+    del dirty[:]
+
+
+def valid(fingerprints):
+    """All {path: fingerprint} pairs still match, missing files never do."""
+    for path, key in fingerprints.items():
+        if key is None or IconThemesCatalog.fingerprint(path) != key:
+            return False
+    return True
+
+
+def get(section):
+    """Section of the manifest if its fingerprints still match."""
+    load()
+    entry = manifest.get(section)
+
+    if isinstance(entry, dict) and valid(entry.get("fingerprints", {})):
+        return entry
+    return None
+
+
+def put(section, entry, write=True):
+    """Replace a section, entry["fingerprints"] maps paths to keys."""
+    load()
+
+    if manifest.get(section) == entry:
+        return
+
+    manifest[section] = entry
+    dirty.append(section)
+
+    if write:
+        save()
+
+
+def onExit():
+    """Write pending sections when the application quits."""
+    import IconThemesCache
+
+    put("keys", IconThemesCache.sourceKeys(), False)
+
+    if dirty:
+        save()
+
+
+if QtGui.QApplication.instance():
+    QtGui.QApplication.instance().aboutToQuit.connect(onExit)
@@ -0,0 +1,131 @@
+# Icon themes for FreeCAD
+# Copyright (C) 2016, 2017, 2018, 2019 triplus @ FreeCAD
+#
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+
+"""Icon preview model.
+
+The view only asks for the decoration of visible rows. Thumbnails of
+those rows are rendered in the background and kept in a bounded least
+recently used cache.
+"""
+
+
+import collections
+from PySide import QtGui
+from PySide import QtCore
+import IconThemesCache
+import IconThemesWorker
+
+
+class Entry(object):
+    """Preview entry."""
+
+    __slots__ = ("text", "toolTip", "name", "source", "icon")
+
+    def __init__(self, text="", toolTip="", name="", source=None, icon=None):
+        self.text = text
+        self.toolTip = toolTip
+        self.name = name
+        self.source = source
+        self.icon = icon
+
+
+def thumbnail(source, size):
+    """Render a thumbnail image (worker thread)."""
+    return source, IconThemesCache.image(IconThemesCache.readSource(source),
+                                         size)
+
+
+class IconModel(QtCore.QAbstractListModel):
+    """List model of preview entries with lazy thumbnails."""
+
+    def __init__(self, parent=None, size=48, limit=512):
+        super(IconModel, self).__init__(parent)
+        self.size = size
+        self.limit = limit
+        self.entries = []
+        self.rows = {}
+        self.thumbnails = collections.OrderedDict()
+        self.tasks = {}
+
+    def setEntries(self, entries):
+        """Replace all entries, sorted by text and source."""
+        for task in self.tasks.values():
+            task.cancel()
+        self.tasks.clear()
+
+        self.beginResetModel()
+        self.entries = sorted(entries,
+                              key=lambda i: (i.text.lower(),
+                                             i.source or ""))
+        self.rows = {}
+        for row, entry in enumerate(self.entries):
+            if entry.source:
+                self.rows.setdefault(entry.source, []).append(row)
+        self.endResetModel()
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        """Number of entries."""
+        if parent.isValid():
+            return 0
+        return len(self.entries)
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        """Entry data, thumbnails are requested on first use."""
+        if not index.isValid() or index.row() >= len(self.entries):
+            return None
+
+        entry = self.entries[index.row()]
+
+        if role == QtCore.Qt.DisplayRole:
+            return entry.text
+        elif role == QtCore.Qt.ToolTipRole:
+            return entry.toolTip or None
+        elif role == 33:
+            return entry.name
+        elif role == QtCore.Qt.DecorationRole:
+            if entry.icon is not None:
+                return entry.icon
+            return self.thumbnail(entry.source)
+
+        return None
+
+    def thumbnail(self, source):
+        """Cached thumbnail or None while it is rendered."""
+        if source in self.thumbnails:
+            self.thumbnails.move_to_end(source)
+            return self.thumbnails[source]
+
+        if source and source not in self.tasks:
+            self.tasks[source] = IconThemesWorker.start(thumbnail,
+                                                        (source, self.size),
+                                                        self.onThumbnail,
+                                                        self)
+        return None
+
+    def onThumbnail(self, result):
+        """Store a rendered thumbnail and refresh its rows."""
+        source, image = result
+        self.tasks.pop(source, None)
+        self.thumbnails[source] = QtGui.QPixmap.fromImage(image)
+
+        while len(self.thumbnails) > self.limit:
+            self.thumbnails.popitem(last=False)
+
+        for row in self.rows.get(source, []):
+            index = self.index(row)
+            self.dataChanged.emit(index, index)
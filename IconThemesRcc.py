@@ -0,0 +1,467 @@
+# Icon themes for FreeCAD
+# Copyright (C) 2016, 2017, 2018, 2019 triplus @ FreeCAD
+#
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+
+"""Qt binary resource (.rcc) reader and compiler.
+
+Pure Python, no Qt required. Supports format versions 1 to 3 and zlib
+compressed entries. Files are memory-mapped, only the accessed parts
+are read. Theme folders can be compiled without the Qt rcc tool.
+"""
+
+
+import os
+import mmap
+import zlib
+import struct
+import IconThemesIndex
+
+MAGIC = b"qres"
+
+FLAG_COMPRESSED = 0x01
+FLAG_DIRECTORY = 0x02
+FLAG_COMPRESSED_ZSTD = 0x04
+
+
+class Reader(object):
+    """Read a binary resource file or buffer."""
+
+    def __init__(self, data):
+        self.data = data
+        self.file = None
+
+        if len(data) < 20 or data[:4] != MAGIC:
+            raise ValueError("Not a binary resource file")
+
+        (self.version,
+         self.treeOffset,
+         self.dataOffset,
+         self.namesOffset) = struct.unpack(">IIII", data[4:20])
+
+        if self.version not in (1, 2, 3):
+            raise ValueError("Unsupported resource format version " +
+                             str(self.version))
+
+        if self.version >= 2:
+            self.nodeSize = 22
+        else:
+            self.nodeSize = 14
+
+        self.names = {}
+
+    @classmethod
+    def open(cls, path):
+        """Memory-map a resource file."""
+        f = open(path, "rb")
+        try:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, mmap.error):
+            f.close()
+            raise ValueError("Not a binary resource file")
+
+        try:
+            reader = cls(data)
+        except ValueError:
+            data.close()
+            f.close()
+            raise
+
+        reader.file = f
+        return reader
+
+    def close(self):
+        """Release the mapping."""
+        if self.file:
+            self.data.close()
+            self.file.close()
+            self.file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def unpack(self, fmt, offset):
+        """Unpack values at an offset, ValueError if out of bounds."""
+        end = offset + struct.calcsize(fmt)
+        if offset < 0 or end > len(self.data):
+            raise ValueError("Truncated binary resource file")
+        return struct.unpack(fmt, self.data[offset:end])
+
+    def slice(self, start, size):
+        """Bytes at an offset, ValueError if out of bounds."""
+        if start < 0 or start + size > len(self.data):
+            raise ValueError("Truncated binary resource file")
+        return self.data[start:start + size]
+
+    def node(self, index):
+        """Return (name, flags, a, b) of a tree node.
+
+        For directories a is the child count and b the first child index,
+        for files a is unused and b the data offset.
+        """
+        offset = self.treeOffset + index * self.nodeSize
+        nameOffset, flags = self.unpack(">IH", offset)
+        if flags & FLAG_DIRECTORY:
+            a, b = self.unpack(">II", offset + 6)
+            if (self.treeOffset + (b + a) * self.nodeSize >
+                    len(self.data)):
+                raise ValueError("Truncated binary resource file")
+        else:
+            a = 0
+            b = self.unpack(">I", offset + 10)[0]
+        return self.name(nameOffset), flags, a, b
+
+    def name(self, offset):
+        """Decode a name from the names section."""
+        if offset not in self.names:
+            start = self.namesOffset + offset
+            length = self.unpack(">H", start)[0]
+            raw = self.slice(start + 6, length * 2)
+            try:
+                self.names[offset] = raw.decode("utf-16-be")
+            except UnicodeDecodeError:
+                raise ValueError("Invalid name in binary resource file")
+        return self.names[offset]
+
+    def children(self, index):
+        """Return {name: node index} of a directory node."""
+        name, flags, count, first = self.node(index)
+        result = {}
+
+        if flags & FLAG_DIRECTORY:
+            for child in range(first, first + count):
+                result[self.node(child)[0]] = child
+        return result
+
+    def find(self, path):
+        """Return node index of a path or None."""
+        index = 0
+        for part in path.strip(":").strip("/").split("/"):
+            if not part:
+                continue
+            index = self.children(index).get(part)
+            if index is None:
+                return None
+        return index
+
+    def isDir(self, path):
+        """True if path is a directory."""
+        index = self.find(path)
+        return (index is not None and
+                bool(self.node(index)[1] & FLAG_DIRECTORY))
+
+    def listDir(self, path="/"):
+        """Return names inside a directory, empty if missing."""
+        index = self.find(path)
+        if index is None:
+            return []
+        return sorted(self.children(index))
+
+    def read(self, path):
+        """Return the contents of a file entry."""
+        index = self.find(path)
+        if index is None:
+            raise KeyError(path)
+
+        name, flags, a, offset = self.node(index)
+        if flags & FLAG_DIRECTORY:
+            raise KeyError(path)
+
+        start = self.dataOffset + offset
+        size = self.unpack(">I", start)[0]
+        raw = self.slice(start + 4, size)
+
+        if flags & FLAG_COMPRESSED_ZSTD:
+            try:
+                import zstandard
+            except ImportError:
+                raise ValueError("Zstandard compressed entry " + path)
+            try:
+                return zstandard.ZstdDecompressor().decompress(raw)
+            except zstandard.ZstdError:
+                raise ValueError("Corrupt compressed entry " + path)
+        elif flags & FLAG_COMPRESSED:
+            # qCompress format, 4 byte big endian length followed by zlib
+            try:
+                return zlib.decompress(raw[4:])
+            except zlib.error:
+                raise ValueError("Corrupt compressed entry " + path)
+        else:
+            return bytes(raw)
+
+    def walk(self, path="/"):
+        """Yield paths of all files below path."""
+        index = self.find(path)
+        if index is None:
+            return
+        stack = [(path.rstrip("/"), index)]
+        seen = set([index])
+
+        while stack:
+            prefix, index = stack.pop()
+            for name, child in self.children(index).items():
+                if child in seen:
+                    raise ValueError("Invalid binary resource tree")
+                seen.add(child)
+                if self.node(child)[1] & FLAG_DIRECTORY:
+                    stack.append((prefix + "/" + name, child))
+                else:
+                    yield prefix + "/" + name
+
+
+def themes(path):
+    """Describe icon themes stored in a resource file.
+
+    Return a list of dictionaries with the theme name, folder, inherited
+    themes, theme directories and icon count.
+    """
+    result = []
+
+    with Reader.open(path) as reader:
+        for folder in reader.listDir("/icons"):
+            try:
+                text = reader.read("/icons/" + folder + "/index.theme")
+            except (KeyError, ValueError):
+                continue
+
+            theme = IconThemesIndex.parse(text, folder)
+            if theme is None:
+                continue
+
+            directories = []
+            icons = 0
+            for d in theme.directories:
+                path = "/icons/" + folder + "/" + d.name
+                if reader.isDir(path):
+                    directories.append(d.name)
+                    icons += len(reader.listDir(path))
+
+            result.append({"name": theme.name,
+                           "folder": folder,
+                           "inherits": theme.inherits,
+                           "directories": directories,
+                           "icons": icons})
+
+    return result
+
+
+def qtHash(name):
+    """Hash of a resource name as computed by Qt (qt_hash)."""
+    h = 0
+    for c in name:
+        h = ((h << 4) + ord(c)) & 0xffffffff
+        h ^= (h & 0xf0000000) >> 23
+        h &= 0x0fffffff
+    return h
+
+
+def compress(data, threshold=70, level=9):
+    """Return qCompress formatted data or None if not worth it.
+
+    Data is compressed only if the result is at most threshold percent
+    of the original size (same rule as the Qt rcc tool). A threshold of
+    0 disables compression.
+    """
+    if not data or threshold <= 0:
+        return None
+    packed = struct.pack(">I", len(data)) + zlib.compress(data, level)
+    if len(packed) * 100 > len(data) * threshold:
+        return None
+    return packed
+
+
+def build(files, version=1, threshold=70, workers=None):
+    """Build binary resource data from {resource path: bytes}.
+
+    Identical contents are stored once. Compression runs on a thread
+    pool for larger inputs (zlib releases the GIL). Return the binary
+    resource data.
+    """
+    if version not in (1, 2, 3):
+        raise ValueError("Unsupported resource format version " +
+                         str(version))
+
+    # Tree of dictionaries, files are leaves holding the content
+    root = {}
+    for path, data in files.items():
+        parts = [i for i in path.strip(":").split("/") if i]
+        node = root
+        for part in parts[:-1]:
+            node = node.setdefault(part, {})
+            if not isinstance(node, dict):
+                raise ValueError("Resource path conflict " + path)
+        node[parts[-1]] = data
+
+    # Store every distinct content once
+    unique = []
+    blobs = {}
+    for data in files.values():
+        if data not in blobs:
+            blobs[data] = len(unique)
+            unique.append(data)
+
+    if workers is None and len(unique) < 64:
+        packed = [compress(i, threshold) for i in unique]
+    else:
+        import concurrent.futures
+        with concurrent.futures.ThreadPoolExecutor(workers) as pool:
+            packed = list(pool.map(lambda i: compress(i, threshold),
+                                   unique))
+
+    dataSection = bytearray()
+    blobOffsets = []
+    blobFlags = []
+    for raw, small in zip(unique, packed):
+        blobOffsets.append(len(dataSection))
+        if small is None:
+            blobFlags.append(0)
+            stored = raw
+        else:
+            blobFlags.append(FLAG_COMPRESSED)
+            stored = small
+        dataSection += struct.pack(">I", len(stored))
+        dataSection += stored
+
+    namesSection = bytearray()
+    nameOffsets = {}
+
+    def nameOffset(name):
+        if name not in nameOffsets:
+            nameOffsets[name] = len(namesSection)
+            encoded = name.encode("utf-16-be")
+            namesSection.extend(struct.pack(">HI",
+                                            len(encoded) // 2,
+                                            qtHash(name)))
+            namesSection.extend(encoded)
+        return nameOffsets[name]
+
+    # Breadth first, children sorted by hash (QResource binary search)
+    nodes = [(None, root)]
+    tree = bytearray()
+    index = 0
+    while index < len(nodes):
+        name, node = nodes[index]
+        index += 1
+
+        if name is None:
+            offset = 0
+        else:
+            offset = nameOffset(name)
+
+        if isinstance(node, dict):
+            children = sorted(node.items(), key=lambda i: qtHash(i[0]))
+            tree += struct.pack(">IHII",
+                                offset,
+                                FLAG_DIRECTORY,
+                                len(children),
+                                len(nodes))
+            nodes.extend(children)
+        else:
+            blob = blobs[node]
+            tree += struct.pack(">IHHHI",
+                                offset,
+                                blobFlags[blob],
+                                0,
+                                1,
+                                blobOffsets[blob])
+        if version >= 2:
+            tree += struct.pack(">Q", 0)
+
+    header = 20
+    if version >= 3:
+        header = 24
+    dataOffset = header
+    namesOffset = dataOffset + len(dataSection)
+    treeOffset = namesOffset + len(namesSection)
+
+    result = bytearray(MAGIC)
+    result += struct.pack(">IIII",
+                          version,
+                          treeOffset,
+                          dataOffset,
+                          namesOffset)
+    if version >= 3:
+        result += struct.pack(">I", 0)
+    result += dataSection
+    result += namesSection
+    result += tree
+
+    return bytes(result)
+
+
+def themeFiles(folder, name=None):
+    """Collect the files of a theme folder.
+
+    Return (theme name, {resource path: bytes}). Icons of every
+    directory listed in index.theme are included. If a single
+    directory is listed and it doesn't exist, icons next to
+    index.theme are used for it (layout of demo-rcc-assets).
+    """
+    with open(os.path.join(folder, "index.theme"), "rb") as f:
+        index = f.read()
+
+    theme = IconThemesIndex.parse(index)
+    if theme is None:
+        raise ValueError("Not an icon theme " + folder)
+
+    if name is None:
+        name = theme.name
+
+    prefix = "/icons/" + name + "/"
+    files = {prefix + "index.theme": index}
+
+    for directory in theme.directories:
+        path = os.path.join(folder, directory.name)
+        if not os.path.isdir(path):
+            if len(theme.directories) == 1:
+                path = folder
+            else:
+                continue
+        for root, dirs, names in os.walk(path):
+            dirs.sort()
+            if root != path and path == folder:
+                continue
+            for f in sorted(names):
+                if not f.endswith(IconThemesIndex.EXTENSIONS):
+                    continue
+                relative = os.path.relpath(os.path.join(root, f), path)
+                with open(os.path.join(root, f), "rb") as i:
+                    files[prefix +
+                          directory.name +
+                          "/" +
+                          relative.replace(os.path.sep, "/")] = i.read()
+
+    return name, files
+
+
+def compileTheme(folder, output=None, name=None, version=1,
+                 threshold=70, workers=None):
+    """Compile a theme folder into binary resource data.
+
+    The data is written to output if given and returned.
+    """
+    name, files = themeFiles(folder, name)
+    data = build(files, version, threshold, workers)
+
+    if output:
+        with open(output + ".tmp", "wb") as f:
+            f.write(data)
+        os.replace(output + ".tmp", output)
+
+    return data
@@ -0,0 +1,194 @@
+# Icon themes for FreeCAD
+# Copyright (C) 2016, 2017, 2018, 2019 triplus @ FreeCAD
+#
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+
+"""Icon themes found at a path.
+
+An Icons folder, resource files (.rcc), theme folders (with
+index.theme), legacy theme folders (SVG files), legacy theme archives
+(.zip) and themes installed in the icon store (.icons) are described
+as sources. Icon names and contents are read without FreeCAD or Qt.
+"""
+
+
+import os
+import IconThemesRcc
+import IconThemesZip
+import IconThemesIndex
+import IconThemesStore
+
+
+class Source(object):
+    """Icon theme stored in a folder, resource file or archive."""
+
+    def __init__(self, kind, path, name, folder=None):
+        self.kind = kind
+        self.path = path
+        self.name = name
+        self.folder = folder
+
+    def label(self):
+        """Kind and location of the theme."""
+        if self.folder:
+            return self.kind + " " + self.path + " (" + self.folder + ")"
+        return self.kind + " " + self.path
+
+    def index(self):
+        """Contents of index.theme or None (legacy themes)."""
+        if self.kind == "rcc" and not self.folder:
+            return None
+        elif self.kind == "rcc":
+            with IconThemesRcc.Reader.open(self.path) as reader:
+                return reader.read("/icons/" + self.folder + "/index.theme")
+        elif self.kind == "theme":
+            with open(os.path.join(self.path, "index.theme"), "rb") as f:
+                return f.read()
+        elif self.kind == "store":
+            obj = IconThemesStore.load(self.path)["files"].get("index.theme")
+            if obj:
+                store = IconThemesStore.manifestStore(self.path)
+                with open(store + obj, "rb") as f:
+                    return f.read()
+        return None
+
+    def names(self):
+        """Icon names (without extension), contents are not read."""
+        names = []
+
+        if self.kind == "rcc" and self.folder:
+            with IconThemesRcc.Reader.open(self.path) as reader:
+                for path in reader.walk("/icons/" + self.folder):
+                    if path.endswith(IconThemesIndex.EXTENSIONS):
+                        names.append(path.rsplit("/", 1)[-1])
+        elif self.kind == "theme":
+            for root, dirs, files in os.walk(self.path):
+                names.extend(i for i in files
+                             if i.endswith(IconThemesIndex.EXTENSIONS))
+        elif self.kind == "zip":
+            return IconThemesZip.names(self.path)
+        elif self.kind == "store":
+            names.extend(i.rsplit("/", 1)[-1]
+                         for i in IconThemesStore.load(self.path)["files"]
+                         if i.endswith(IconThemesIndex.EXTENSIONS))
+        elif self.kind == "legacy":
+            names.extend(i for i in os.listdir(self.path)
+                         if i.endswith(".svg"))
+
+        return frozenset(os.path.splitext(i)[0] for i in names)
+
+    def icons(self):
+        """Yield (icon path, contents) of every icon."""
+        if self.kind == "rcc" and not self.folder:
+            return
+        elif self.kind == "rcc":
+            prefix = "/icons/" + self.folder + "/"
+            with IconThemesRcc.Reader.open(self.path) as reader:
+                for path in reader.walk(prefix[:-1]):
+                    if path.endswith(IconThemesIndex.EXTENSIONS):
+                        try:
+                            data = reader.read(path)
+                        except ValueError:
+                            # Corrupt entry, reported as an empty icon.
+                            data = b""
+                        yield path[len(prefix):], data
+        elif self.kind == "theme":
+            try:
+                name, files = IconThemesRcc.themeFiles(self.path)
+            except ValueError:
+                # Invalid index.theme, report every icon of the folder.
+                name, files = self.name, {}
+                for root, dirs, names in os.walk(self.path):
+                    for f in names:
+                        if f.endswith(IconThemesIndex.EXTENSIONS):
+                            path = os.path.join(root, f)
+                            with open(path, "rb") as i:
+                                files["/icons/" + name + "/" +
+                                      os.path.relpath(path, self.path)
+                                      .replace(os.path.sep, "/")] = i.read()
+            prefix = "/icons/" + name + "/"
+            for path in sorted(files):
+                if path.endswith(IconThemesIndex.EXTENSIONS):
+                    yield path[len(prefix):], files[path]
+        elif self.kind == "store":
+            store = IconThemesStore.manifestStore(self.path)
+            files = IconThemesStore.load(self.path)["files"]
+            for name in sorted(files):
+                if name.endswith(IconThemesIndex.EXTENSIONS):
+                    with open(store + files[name], "rb") as f:
+                        yield name, f.read()
+        elif self.kind == "zip":
+            for name in sorted(IconThemesZip.names(self.path)):
+                yield name + ".svg", IconThemesZip.read(self.path,
+                                                        name + ".svg")
+        else:
+            for name in sorted(os.listdir(self.path)):
+                path = os.path.join(self.path, name)
+                if name.endswith(".svg") and os.path.isfile(path):
+                    with open(path, "rb") as f:
+                        yield name, f.read()
+
+
+def rccSources(path):
+    """Themes of a resource file."""
+    sources = []
+
+    try:
+        with IconThemesRcc.Reader.open(path) as reader:
+            folders = reader.listDir("/icons")
+    except (IOError, OSError, ValueError, KeyError):
+        folders = []
+
+    for folder in folders:
+        sources.append(Source("rcc", path, folder, folder))
+
+    if not sources:
+        sources.append(Source("rcc", path, os.path.basename(path)))
+
+    return sources
+
+
+def sources(path):
+    """Themes found at a path."""
+    path = path.rstrip("/" + os.path.sep) or path
+    base = os.path.basename(path)
+
+    if path.lower().endswith(".rcc") and os.path.isfile(path):
+        return rccSources(path)
+    elif IconThemesZip.isArchive(path):
+        return [Source("zip", path, base[:-4])]
+    elif IconThemesStore.isManifest(path):
+        return [Source("store", path, os.path.splitext(base)[0])]
+    elif not os.path.isdir(path):
+        return []
+    elif os.path.isfile(os.path.join(path, "index.theme")):
+        return [Source("theme", path, base)]
+
+    names = sorted(os.listdir(path))
+
+    if any(i.endswith(".svg") for i in names):
+        return [Source("legacy", path, base)]
+
+    result = []
+    for name in names:
+        child = os.path.join(path, name)
+        if (name.lower().endswith((".rcc",
+                                   ".zip",
+                                   IconThemesStore.EXTENSION)) or
+                os.path.isdir(child)):
+            result.extend(sources(child))
+
+    return result
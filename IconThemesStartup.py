@@ -0,0 +1,91 @@
+# Icon themes for FreeCAD
+# Copyright (C) 2016, 2017, 2018, 2019 triplus @ FreeCAD
+#
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+
+"""Icon themes startup coordinator.
+
+Phases that must happen before the interface is built (scan, register,
+theme) run immediately. The remaining phases (apply, menu, watch) run in
+order on the first event loop iteration. A per-phase timing breakdown is
+written to the report view log.
+"""
+
+
+import time
+import FreeCAD as App
+from PySide import QtCore
+
+PHASES = ["scan", "register", "theme", "apply", "menu", "watch"]
+
+timings = {}
+scheduled = []
+started = []
+
+
+def run(phase, function, *args):
+    """Run a startup phase now and time it."""
+    start = time.perf_counter()
+    try:
+        return function(*args)
+    finally:
+        timings[phase] = (timings.get(phase, 0) +
+                          time.perf_counter() -
+                          start)
+
+
+def schedule(phase, function):
+    """Run a startup phase on the first event loop iteration."""
+    scheduled.append([phase, function])
+
+    if not started:
+        started.append(True)
+        QtCore.QTimer.singleShot(0, onEventLoop)
+
+
+def onEventLoop():
+    """Run scheduled phases in order and report timings."""
+    for phase in PHASES:
+        for i in scheduled:
+            if i[0] == phase:
+                try:
+                    run(phase, i[1])
+                except Exception as e:
+                    App.Console.PrintError("Icon themes: startup phase " +
+                                           phase +
+                                           " failed (" +
+                                           str(e) +
+                                           ").\n")
+    del scheduled[:]
+    App.Console.PrintLog(report() + "\n")
+
+
+def report():
+    """Startup timing breakdown as text."""
+    parts = []
+    for phase in PHASES:
+        if phase in timings:
+            parts.append(phase +
+                         " " +
+                         "%.1f" % (timings[phase] * 1000) +
+                         " ms")
+    total = sum(timings.values()) * 1000
+
+    return ("Icon themes: startup " +
+            ", ".join(parts) +
+            ", total " +
+            "%.1f" % total +
+            " ms.")
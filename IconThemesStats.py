@@ -0,0 +1,161 @@
+# Icon themes for FreeCAD
+# Copyright (C) 2016, 2017, 2018, 2019 triplus @ FreeCAD
+#
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+
+"""Icon themes instrumentation.
+
+Enabled by the Instrumentation boolean under BaseApp/IconThemes, read
+once when the module is imported. When disabled, instrument() returns
+the function unchanged and count() returns at once.
+
+Per function: calls, cumulative and maximum wall time, actions touched
+and files stat'ed. Use stats() from the Python console. On exit the
+data is written to the report view, or to the JSON file named by the
+InstrumentationFile string parameter.
+
+Modules add memory footprint reporters to footprints, footprint() is
+available whether instrumentation is enabled or not.
+"""
+
+
+import json
+import time
+import functools
+import FreeCAD as App
+from PySide import QtGui
+
+p = App.ParamGet("User parameter:BaseApp/IconThemes")
+enabled = p.GetBool("Instrumentation", False)
+
+records = {}
+footprints = {}
+
+
+def record(name):
+    """Counters of a function."""
+    if name not in records:
+        records[name] = {"calls": 0,
+                         "total": 0.0,
+                         "max": 0.0,
+                         "actions": 0,
+                         "files": 0}
+    return records[name]
+
+
+def instrument(name):
+    """Decorator counting calls and wall time of a function."""
+    def decorator(function):
+        if not enabled:
+            return function
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                r = record(name)
+                r["calls"] += 1
+                r["total"] += elapsed
+                if elapsed > r["max"]:
+                    r["max"] = elapsed
+
+        return wrapper
+
+    return decorator
+
+
+def count(name, actions=0, files=0):
+    """Add touched actions and stat'ed files to a function record."""
+    if enabled:
+        r = record(name)
+        r["actions"] += actions
+        r["files"] += files
+
+
+def stats():
+    """Copy of all records."""
+    return {name: dict(r) for name, r in records.items()}
+
+
+def reset():
+    """Clear all records."""
+    records.clear()
+
+
+def report():
+    """Records as text, one line per function."""
+    lines = []
+    for name in sorted(records):
+        r = records[name]
+        lines.append("Icon themes: " +
+                     name +
+                     " calls " +
+                     str(r["calls"]) +
+                     ", total " +
+                     "%.1f" % (r["total"] * 1000) +
+                     " ms, max " +
+                     "%.1f" % (r["max"] * 1000) +
+                     " ms, actions " +
+                     str(r["actions"]) +
+                     ", files " +
+                     str(r["files"]) +
+                     ".")
+    return "\n".join(lines)
+
+
+def footprint():
+    """Memory footprint of every reporting module."""
+    return {name: function() for name, function in footprints.items()}
+
+
+def footprintReport():
+    """Memory footprint as text, one line per module."""
+    lines = []
+    for name, values in sorted(footprint().items()):
+        lines.append("Icon themes: " +
+                     name +
+                     " " +
+                     ", ".join(k + " " + str(values[k])
+                               for k in sorted(values)) +
+                     ".")
+    return "\n".join(lines)
+
+
+def dump(path=None):
+    """Write records to a JSON file or to the report view."""
+    if path:
+        with open(path, "w") as f:
+            json.dump(stats(), f, indent=1, sort_keys=True)
+    elif records:
+        App.Console.PrintMessage(report() + "\n")
+        App.Console.PrintMessage(footprintReport() + "\n")
+
+
+def onExit():
+    """Dump records when the application quits."""
+    try:
+        dump(p.GetString("InstrumentationFile"))
+    except (IOError, OSError) as e:
+        App.Console.PrintWarning("Icon themes: instrumentation dump failed (" +
+                                 str(e) +
+                                 ").\n")
+
+
+if enabled and QtGui.QApplication.instance():
+    QtGui.QApplication.instance().aboutToQuit.connect(onExit)
@@ -0,0 +1,308 @@
+# Icon themes for FreeCAD
+# Copyright (C) 2016, 2017, 2018, 2019 triplus @ FreeCAD
+#
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+
+"""Content-addressed icon store shared by installed themes.
+
+Icon files are stored once, named by the SHA-1 of their contents
+("IconThemes/store/<sha1>.svg" in the user data folder). An installed
+theme is a small manifest ("Gui/Icons/<name>.icons") mapping file names
+to stored objects. Sibling themes share the files they have in common,
+legacy themes then also share icons and rendered pixmaps, the icon
+source of a stored file is the same for every theme using it.
+
+Legacy themes (SVG files named after commands) are used from the
+manifest. Themes with an index.theme (folders and .rcc files) are
+registered from resource data built from the store, like a .rcc file.
+No FreeCAD required.
+"""
+
+
+import os
+import json
+import hashlib
+import threading
+import IconThemesRcc
+import IconThemesZip
+import IconThemesIndex
+
+FORMAT = 1
+EXTENSION = ".icons"
+
+manifests = {}
+lock = threading.RLock()
+
+
+def storePath(data):
+    """Store folder of a FreeCAD user data folder."""
+    return os.path.join(data, "IconThemes", "store") + os.path.sep
+
+
+def iconsPath(data):
+    """Icons folder of a FreeCAD user data folder."""
+    return os.path.join(data, "Gui", "Icons") + os.path.sep
+
+
+def manifestStore(path):
+    """Store folder of a manifest installed in "Gui/Icons"."""
+    icons = os.path.dirname(os.path.abspath(path.rstrip("/" + os.path.sep)))
+    return storePath(os.path.dirname(os.path.dirname(icons)))
+
+
+def isManifest(path):
+    """Path names an installed theme manifest (trailing separator allowed)."""
+    path = path.rstrip("/" + os.path.sep)
+    return path.endswith(EXTENSION) and os.path.isfile(path)
+
+
+def writeFile(path, data):
+    """Write a file atomically."""
+    temp = path + ".tmp" + str(os.getpid())
+    with open(temp, "wb") as f:
+        f.write(data)
+    os.replace(temp, path)
+
+
+def objectName(name, data):
+    """Name of a stored file: hash of the contents and file extension."""
+    return hashlib.sha1(data).hexdigest() + os.path.splitext(name)[1].lower()
+
+
+def put(store, name, data):
+    """Store the contents of a file, return the object name."""
+    obj = objectName(name, data)
+    path = store + obj
+
+    if not os.path.isfile(path):
+        if not os.path.isdir(store):
+            os.makedirs(store)
+        writeFile(path, data)
+
+    return obj
+
+
+def load(path):
+    """Manifest of an installed theme, read again when it changes."""
+    path = path.rstrip("/" + os.path.sep)
+
+    with lock:
+        current = manifests.get(path)
+        key = IconThemesZip.stat(path)
+
+        if current is not None and current[0] == key:
+            return current[1]
+
+        try:
+            with open(path) as f:
+                manifest = json.load(f)
+        except (IOError, OSError, ValueError):
+            manifest = None
+
+        if (not isinstance(manifest, dict) or
+                manifest.get("format") != FORMAT):
+            manifest = {"format": FORMAT, "files": {}}
+
+        manifests[path] = [key, manifest]
+        return manifest
+
+
+def names(path):
+    """Icon names (without extension) of a legacy theme manifest."""
+    return frozenset(os.path.splitext(i)[0]
+                     for i in load(path)["files"]
+                     if i.endswith(".svg") and "/" not in i)
+
+
+def source(store, path, name):
+    """Stored file of an icon, path of a missing icon inside the theme."""
+    obj = load(path)["files"].get(name + ".svg")
+
+    if obj:
+        return store + obj
+    return path.rstrip("/" + os.path.sep) + os.path.sep + name + ".svg"
+
+
+def rccFiles(path):
+    """Yield (theme folder, {file name: contents}) of a .rcc file."""
+    with IconThemesRcc.Reader.open(path) as reader:
+        for folder in reader.listDir("/icons"):
+            prefix = "/icons/" + folder + "/"
+            files = {}
+            for i in reader.walk(prefix[:-1]):
+                files[i[len(prefix):]] = reader.read(i)
+            yield folder, files
+
+
+def folderFiles(path):
+    """{file name: contents} of a theme folder or legacy theme folder."""
+    files = {}
+    theme = os.path.isfile(os.path.join(path, "index.theme"))
+
+    for root, dirs, names in os.walk(path):
+        if not theme:
+            dirs[:] = []
+        for f in names:
+            if ((theme and f == "index.theme") or
+                    f.endswith(IconThemesIndex.EXTENSIONS if theme
+                               else ".svg")):
+                relative = os.path.relpath(os.path.join(root, f), path)
+                with open(os.path.join(root, f), "rb") as i:
+                    files[relative.replace(os.path.sep, "/")] = i.read()
+
+    return files
+
+
+def importTheme(data, path, name=None, force=False):
+    """Import themes of a folder, archive or .rcc file into the store.
+
+    A manifest is installed for every theme, ValueError is raised if a
+    theme of that name is installed already (unless force is True).
+    Return a list of reports with the theme name, the number of files,
+    files added to the store and bytes of files that were stored
+    already.
+    """
+    path = path.rstrip("/" + os.path.sep)
+    base = os.path.splitext(os.path.basename(path))[0]
+
+    if path.lower().endswith(".rcc"):
+        found = list(rccFiles(path))
+    elif IconThemesZip.isArchive(path):
+        files = {}
+        for i in IconThemesZip.names(path):
+            files[i + ".svg"] = IconThemesZip.read(path, i + ".svg")
+        found = [(base, files)]
+    else:
+        files = folderFiles(path)
+        theme = IconThemesIndex.parse(files.get("index.theme", b""))
+        found = [(theme.name if theme else base, files)]
+
+    if name is not None and len(found) == 1:
+        found = [(name, found[0][1])]
+
+    if not force:
+        for folder, files in found:
+            if os.path.isfile(iconsPath(data) + folder + EXTENSION):
+                raise ValueError(folder + EXTENSION + " is installed already")
+
+    return [importFiles(data, folder, files) for folder, files in found]
+
+
+def importFiles(data, name, files):
+    """Store files of a theme and install its manifest."""
+    store = storePath(data)
+    objects = {}
+    report = {"name": name, "files": 0, "added": 0, "shared": 0}
+
+    for f in sorted(files):
+        contents = files[f]
+        if not contents:
+            continue
+        exists = os.path.isfile(store + objectName(f, contents))
+        objects[f] = put(store, f, contents)
+        report["files"] += 1
+        if exists:
+            report["shared"] += len(contents)
+        else:
+            report["added"] += 1
+
+    report["kind"] = "theme" if "index.theme" in objects else "legacy"
+    manifest = {"format": FORMAT,
+                "name": name,
+                "kind": report["kind"],
+                "files": objects}
+
+    icons = iconsPath(data)
+    if not os.path.isdir(icons):
+        os.makedirs(icons)
+    writeFile(icons + name + EXTENSION,
+              json.dumps(manifest, indent=1, sort_keys=True).encode("UTF-8"))
+
+    return report
+
+
+def themes(store, path):
+    """Describe the theme of a manifest like IconThemesRcc.themes()."""
+    manifest = load(path)
+    obj = manifest["files"].get("index.theme")
+
+    if manifest.get("kind") != "theme" or not obj:
+        return []
+
+    with open(store + obj, "rb") as f:
+        theme = IconThemesIndex.parse(f.read(), manifest["name"])
+
+    if theme is None:
+        return []
+
+    directories = []
+    icons = 0
+    for d in theme.directories:
+        prefix = d.name + "/"
+        count = sum(1 for i in manifest["files"] if i.startswith(prefix))
+        if count:
+            directories.append(d.name)
+            icons += count
+
+    return [{"name": theme.name,
+             "folder": manifest["name"],
+             "inherits": theme.inherits,
+             "directories": directories,
+             "icons": icons}]
+
+
+def build(store, path):
+    """Binary resource data (.rcc format) of an installed theme."""
+    manifest = load(path)
+    files = {}
+
+    for f, obj in manifest["files"].items():
+        with open(store + obj, "rb") as i:
+            files["/icons/" + manifest["name"] + "/" + f] = i.read()
+
+    return IconThemesRcc.build(files, threshold=0)
+
+
+def installed(data, kind=None):
+    """Manifests of installed themes, of one kind if given."""
+    icons = iconsPath(data)
+    result = []
+
+    if os.path.isdir(icons):
+        for f in sorted(os.listdir(icons)):
+            if (f.endswith(EXTENSION) and
+                    (kind is None or load(icons + f).get("kind") == kind)):
+                result.append(icons + f)
+
+    return result
+
+
+def collect(data):
+    """Remove stored files no installed theme uses, return their number."""
+    store = storePath(data)
+    used = set()
+    removed = 0
+
+    for path in installed(data):
+        used.update(load(path)["files"].values())
+
+    if os.path.isdir(store):
+        for f in os.listdir(store):
+            if f not in used and ".tmp" not in f:
+                os.remove(store + f)
+                removed += 1
+
+    return removed
@@ -0,0 +1,374 @@
+# Icon themes for FreeCAD
+# Copyright (C) 2016, 2017, 2018, 2019 triplus @ FreeCAD
+#
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+
+"""SVG optimization for icon themes.
+
+Strips editor metadata and comments, drops unreferenced definitions,
+rounds coordinates and merges presentation attributes into a single
+style. Works on theme folders and on .rcc packs, files are processed
+in a process pool. Meant to be run from the command line, not inside
+FreeCAD. Parse times are measured with the XML parser as a proxy for
+the SVG renderer.
+"""
+
+
+import os
+import re
+import shutil
+import time
+import xml.etree.ElementTree as ET
+import IconThemesRcc
+
+SVG = "http://www.w3.org/2000/svg"
+XLINK = "http://www.w3.org/1999/xlink"
+
+EDITOR = (
+    "http://www.inkscape.org/namespaces/inkscape",
+    "http://sodipodi.sourceforge.net/DTD/sodipodi-0.dtd",
+    "http://inkscape.sourceforge.net/DTD/sodipodi-0.dtd",
+    "http://www.w3.org/1999/02/22-rdf-syntax-ns#",
+    "http://creativecommons.org/ns#",
+    "http://purl.org/dc/elements/1.1/",
+    "http://ns.adobe.com/AdobeIllustrator/10.0/",
+    "http://ns.adobe.com/Extensibility/1.0/",
+    "http://ns.adobe.com/SaveForWeb/1.0/",
+)
+
+PRESENTATION = (
+    "fill", "fill-opacity", "fill-rule", "stroke", "stroke-width",
+    "stroke-opacity", "stroke-linecap", "stroke-linejoin",
+    "stroke-miterlimit", "stroke-dasharray", "stroke-dashoffset",
+    "opacity", "stop-color", "stop-opacity", "display", "visibility",
+    "font-family", "font-size", "font-weight", "font-style",
+    "text-anchor", "color",
+)
+
+GEOMETRY = (
+    "points", "transform", "gradientTransform", "patternTransform",
+    "x", "y", "x1", "y1", "x2", "y2", "cx", "cy", "r", "rx", "ry",
+    "fx", "fy", "width", "height", "offset", "viewBox",
+)
+
+NUMBER = re.compile(r"[-+]?(?:\d+\.\d*|\.\d+|\d+)(?:[eE][-+]?\d+)?")
+PATH_NUMBER = re.compile(r"[\s,]*(" + NUMBER.pattern + ")")
+PATH_FLAG = re.compile(r"[\s,]*([01])")
+PATH_COMMAND = re.compile(r"[\s,]*([MmZzLlHhVvCcSsQqTtAa])")
+REFERENCE = re.compile(r"url\(\s*['\"]?#([^)'\"\s]+)")
+
+ET.register_namespace("", SVG)
+ET.register_namespace("xlink", XLINK)
+
+
+def namespace(tag):
+    """Namespace of an ElementTree tag or attribute name."""
+    if tag.startswith("{"):
+        return tag[1:].split("}")[0]
+    return ""
+
+
+def local(tag):
+    """Local part of an ElementTree tag or attribute name."""
+    return tag.split("}")[-1]
+
+
+def formatNumber(text, precision):
+    """Round a number, shortest notation.
+
+    Numbers below 1 keep precision significant digits instead of
+    decimals, small scale factors of transforms don't become 0.
+    """
+    value = float(text)
+    if value and abs(value) < 1:
+        result = ("%." + str(precision) + "g") % value
+    else:
+        value = round(value, precision)
+        if value == int(value):
+            return str(int(value))
+        result = ("%." + str(precision) + "f") % value
+    if "e" in result:
+        return result
+    return result.rstrip("0").rstrip(".")
+
+
+def roundNumbers(text, precision):
+    """Round all numbers in an attribute value."""
+    def replace(match):
+        result = formatNumber(match.group(0), precision)
+        # Numbers written without separator ("1.5.5") stay apart.
+        start = match.start()
+        if start and (text[start - 1].isdigit() or text[start - 1] == "."):
+            return " " + result
+        return result
+
+    return NUMBER.sub(replace, text)
+
+
+def roundPath(text, precision):
+    """Round the numbers of path data, the original if it can't be read.
+
+    Path data is tokenized per command, the large arc and sweep flags of
+    arcs are single digits that may be written without separator
+    ("a4 4 0 018 0") and are passed through unchanged.
+    """
+    result = ""
+    command = ""
+    index = 0
+    position = 0
+
+    while position < len(text):
+        match = PATH_COMMAND.match(text, position)
+        if match:
+            command = match.group(1)
+            index = 0
+            result += command
+            position = match.end()
+            continue
+
+        if command in ("A", "a") and index % 7 in (3, 4):
+            match = PATH_FLAG.match(text, position)
+            value = match.group(1) if match else None
+        else:
+            match = PATH_NUMBER.match(text, position)
+            if match:
+                value = formatNumber(match.group(1), precision)
+            else:
+                value = None
+
+        if value is None:
+            if text[position:].strip(" \t\r\n,"):
+                return text
+            break
+
+        if result and not result[-1].isalpha() and value[0] != "-":
+            result += " "
+        result += value
+        index += 1
+        position = match.end()
+
+    return result
+
+
+def parseStyle(text):
+    """Parse a style attribute into an ordered dictionary."""
+    result = {}
+    for item in text.split(";"):
+        if ":" in item:
+            key, value = item.split(":", 1)
+            key = key.strip()
+            if key and not key.startswith("-inkscape"):
+                result[key] = value.strip()
+    return result
+
+
+def references(root):
+    """Ids referenced by url(#id) or href="#id"."""
+    found = set()
+    for element in root.iter():
+        for key, value in element.attrib.items():
+            if local(key) == "href" and value.startswith("#"):
+                found.add(value[1:])
+            else:
+                found.update(REFERENCE.findall(value))
+        if element.text and local(element.tag) == "style":
+            found.update(REFERENCE.findall(element.text))
+    return found
+
+
+def clean(root, precision):
+    """Optimize a parsed SVG tree in place."""
+    parents = {c: p for p in root.iter() for c in p}
+
+    # Editor metadata
+    for element in list(root.iter()):
+        if (local(element.tag) == "metadata" or
+                namespace(element.tag) in EDITOR):
+            if element in parents:
+                parents[element].remove(element)
+
+    for element in root.iter():
+        for key in list(element.attrib):
+            if namespace(key) in EDITOR:
+                del element.attrib[key]
+
+    # Unreferenced definitions, repeat as definitions reference others
+    changed = True
+    while changed:
+        changed = False
+        used = references(root)
+        for defs in root.iter("{" + SVG + "}defs"):
+            for child in list(defs):
+                # Style sheets and elements without id are kept.
+                if (local(child.tag) != "style" and
+                        child.get("id") is not None and
+                        child.get("id") not in used):
+                    defs.remove(child)
+                    changed = True
+
+    for defs in list(root.iter("{" + SVG + "}defs")):
+        if not len(defs) and defs in parents:
+            parents[defs].remove(defs)
+
+    # Styles and coordinates
+    for element in root.iter():
+        style = parseStyle(element.get("style", ""))
+        for key in PRESENTATION:
+            if key in element.attrib:
+                style.setdefault(key, element.attrib.pop(key))
+        if style:
+            element.set("style", ";".join(k + ":" + v
+                                          for k, v in style.items()))
+        elif "style" in element.attrib:
+            del element.attrib["style"]
+
+        for key in GEOMETRY:
+            if key in element.attrib:
+                element.set(key, roundNumbers(element.get(key), precision))
+        if "d" in element.attrib:
+            element.set("d", roundPath(element.get("d"), precision))
+
+
+def optimize(data, precision=3):
+    """Return optimized SVG data, or the original if not smaller."""
+    try:
+        root = ET.fromstring(data)
+    except ET.ParseError:
+        return data
+
+    clean(root, precision)
+    result = ET.tostring(root, encoding="UTF-8")
+
+    if len(result) < len(data):
+        return result
+    return data
+
+
+def parseTime(data):
+    """Time needed to parse SVG data."""
+    start = time.perf_counter()
+    try:
+        ET.fromstring(data)
+    except ET.ParseError:
+        pass
+    return time.perf_counter() - start
+
+
+def process(item):
+    """Optimize one file (worker process)."""
+    key, data, precision = item
+    result = optimize(data, precision)
+    return key, result, parseTime(data), parseTime(result)
+
+
+def run(files, precision=3, workers=None):
+    """Optimize {key: SVG data}, return ({key: data}, report)."""
+    report = {"files": len(files),
+              "before": 0,
+              "after": 0,
+              "parseBefore": 0.0,
+              "parseAfter": 0.0}
+    items = [(key, data, precision) for key, data in files.items()]
+
+    if workers == 1 or len(items) < 32:
+        results = [process(i) for i in items]
+    else:
+        import concurrent.futures
+        with concurrent.futures.ProcessPoolExecutor(workers) as pool:
+            results = list(pool.map(process, items, chunksize=16))
+
+    optimized = {}
+    for key, data, before, after in results:
+        optimized[key] = data
+        report["before"] += len(files[key])
+        report["after"] += len(data)
+        report["parseBefore"] += before
+        report["parseAfter"] += after
+
+    report["saved"] = report["before"] - report["after"]
+    return optimized, report
+
+
+def optimizeFolder(folder, output=None, precision=3, workers=None):
+    """Optimize SVG files of a theme folder.
+
+    Files are rewritten in place unless output names another folder,
+    other files (index.theme) are then copied. Return a list with a
+    report dictionary.
+    """
+    files = {}
+    for root, dirs, names in os.walk(folder):
+        for f in names:
+            path = os.path.join(root, f)
+            if f.endswith(".svg"):
+                with open(path, "rb") as i:
+                    files[os.path.relpath(path, folder)] = i.read()
+            elif output is not None:
+                target = os.path.join(output, os.path.relpath(path, folder))
+                if not os.path.isdir(os.path.dirname(target)):
+                    os.makedirs(os.path.dirname(target))
+                shutil.copyfile(path, target)
+
+    optimized, report = run(files, precision, workers)
+
+    for relative, data in optimized.items():
+        if output is None and data == files[relative]:
+            continue
+        path = os.path.join(output or folder, relative)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, "wb") as f:
+            f.write(data)
+
+    report["theme"] = os.path.basename(os.path.normpath(folder))
+    return [report]
+
+
+def optimizeRcc(path, output=None, precision=3, workers=None, version=1):
+    """Optimize SVG files inside a .rcc pack.
+
+    The pack is rebuilt in place unless output names another file.
+    Return a list of report dictionaries, one per theme.
+    """
+    with IconThemesRcc.Reader.open(path) as reader:
+        files = {}
+        for f in reader.walk("/"):
+            files[f] = reader.read(f)
+
+    themes = {}
+    for f in files:
+        if f.endswith(".svg"):
+            parts = f.split("/")
+            if len(parts) > 3 and parts[1] == "icons":
+                theme = parts[2]
+            else:
+                theme = ""
+            themes.setdefault(theme, {})[f] = files[f]
+
+    reports = []
+    for theme in sorted(themes):
+        optimized, report = run(themes[theme], precision, workers)
+        files.update(optimized)
+        report["theme"] = theme
+        reports.append(report)
+
+    data = IconThemesRcc.build(files, version)
+    target = output or path
+    with open(target + ".tmp", "wb") as f:
+        f.write(data)
+    os.replace(target + ".tmp", target)
+
+    return reports
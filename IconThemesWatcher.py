@@ -0,0 +1,187 @@
+# Icon themes for FreeCAD
+# Copyright (C) 2016, 2017, 2018, 2019 triplus @ FreeCAD
+#
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+
+"""Icon themes folder watcher.
+
+Folders are watched with QFileSystemWatcher. Notifications are
+collected until the folder has been quiet for a short delay, then the
+folder listing is compared with its previous snapshot and a single
+change with added, removed and modified file names is emitted. Files
+saved by replacing them (most editors and tools do) change the folder.
+Files written in place only notify when they are watched themselves,
+that takes a descriptor per file on macOS, so only named files are
+watched and at most FILES of them. Disabled by the HotReload parameter.
+"""
+
+
+import os
+import FreeCAD as App
+from PySide import QtCore
+
+p = App.ParamGet("User parameter:BaseApp/IconThemes")
+
+FILES = 200
+
+
+def enabled():
+    """Hot reload is enabled."""
+    return p.GetBool("HotReload", True)
+
+
+def snapshot(path, extensions):
+    """Modification time and size of matching files in a folder."""
+    result = {}
+
+    try:
+        for i in os.scandir(path):
+            if i.name.endswith(extensions) and i.is_file():
+                st = i.stat()
+                result[i.name] = (st.st_mtime_ns, st.st_size)
+    except OSError:
+        pass
+
+    return result
+
+
+class Change(object):
+    """Changed file names of a watched folder."""
+
+    __slots__ = ("path", "added", "removed", "modified")
+
+    def __init__(self, path, added, removed, modified):
+        self.path = path
+        self.added = added
+        self.removed = removed
+        self.modified = modified
+
+    def names(self):
+        """All changed file names."""
+        return self.added | self.removed | self.modified
+
+
+class Watcher(QtCore.QObject):
+    """Debounced watcher of icon theme folders."""
+
+    changed = QtCore.Signal(object)
+
+    def __init__(self, parent=None, delay=300):
+        super(Watcher, self).__init__(parent)
+        self.watcher = QtCore.QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self.onChanged)
+        self.watcher.fileChanged.connect(self.onChanged)
+        self.timer = QtCore.QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(delay)
+        self.timer.timeout.connect(self.onTimeout)
+        self.folders = {}
+        self.pending = set()
+
+    def watch(self, path, extensions, files=()):
+        """Watch a folder, and the named files in it (edited in place)."""
+        path = os.path.normpath(path)
+
+        if path in self.folders or not os.path.isdir(path):
+            return
+
+        self.folders[path] = [extensions, snapshot(path, extensions), set()]
+        self.watcher.addPath(path)
+        self.watchFiles(path, files)
+
+    def watchFiles(self, path, files):
+        """Also watch named files of a watched folder, up to FILES."""
+        path = os.path.normpath(path)
+
+        if path not in self.folders:
+            return
+
+        wanted = self.folders[path][2]
+        wanted.update(files)
+        watched = set(self.watcher.files())
+        paths = [os.path.join(path, i) for i in sorted(wanted)]
+        paths = [i for i in paths if i not in watched and os.path.isfile(i)]
+        paths = paths[:max(0, FILES - len(watched))]
+        if paths:
+            self.watcher.addPaths(paths)
+
+    def unwatch(self, path):
+        """Stop watching a folder and its files."""
+        path = os.path.normpath(path)
+
+        if path not in self.folders:
+            return
+
+        wanted = self.folders.pop(path)[2]
+        self.pending.discard(path)
+        watched = set(self.watcher.files()) | set(self.watcher.directories())
+        paths = [os.path.join(path, i) for i in wanted] + [path]
+        paths = [i for i in paths if i in watched]
+        if paths:
+            self.watcher.removePaths(paths)
+
+    def clear(self):
+        """Stop watching all folders."""
+        for path in list(self.folders):
+            self.unwatch(path)
+
+    def onChanged(self, path):
+        """Collect a notification and restart the quiet period."""
+        path = os.path.normpath(path)
+
+        if path not in self.folders:
+            path = os.path.dirname(path)
+
+        if path in self.folders:
+            self.pending.add(path)
+            self.timer.start()
+
+    def onTimeout(self):
+        """Compare pending folders with their snapshots."""
+        pending = sorted(self.pending)
+        self.pending.clear()
+
+        for path in pending:
+            if path not in self.folders:
+                continue
+
+            extensions, before = self.folders[path][:2]
+            after = snapshot(path, extensions)
+            self.folders[path][1] = after
+
+            if not os.path.isdir(path):
+                self.unwatch(path)
+            elif path not in self.watcher.directories():
+                self.watcher.addPath(path)
+            # Replaced files are no longer watched.
+            self.watchFiles(path, ())
+
+            added = set(after) - set(before)
+            removed = set(before) - set(after)
+            modified = set(i for i in after
+                           if i in before and after[i] != before[i])
+
+            if added or removed or modified:
+                App.Console.PrintLog("Icon themes: " +
+                                     path +
+                                     " changed (" +
+                                     str(len(added)) +
+                                     " added, " +
+                                     str(len(removed)) +
+                                     " removed, " +
+                                     str(len(modified)) +
+                                     " modified).\n")
+                self.changed.emit(Change(path, added, removed, modified))
@@ -0,0 +1,100 @@
+# Icon themes for FreeCAD
+# Copyright (C) 2016, 2017, 2018, 2019 triplus @ FreeCAD
+#
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+
+"""Background tasks for the icon themes dialogs.
+
+Functions run on the global QThreadPool, the result is delivered back
+to the GUI thread through a queued signal. Tasks of a dialog are
+cancelled when the dialog closes, the callback is then never called.
+"""
+
+
+import FreeCAD as App
+from PySide import QtCore
+
+
+class Signals(QtCore.QObject):
+    """Task signals, delivered in the GUI thread."""
+
+    done = QtCore.Signal(object)
+    failed = QtCore.Signal(str)
+
+
+class Task(QtCore.QRunnable):
+    """Run a function in the thread pool."""
+
+    def __init__(self, function, args, callback):
+        super(Task, self).__init__()
+        self.setAutoDelete(False)
+        self.function = function
+        self.args = args
+        self.callback = callback
+        self.cancelled = False
+        self.signals = Signals()
+        self.signals.done.connect(self.onDone)
+        self.signals.failed.connect(self.onFailed)
+
+    def run(self):
+        """Worker thread."""
+        result = None
+        if not self.cancelled:
+            try:
+                result = self.function(*self.args)
+            except Exception as e:
+                self.signals.failed.emit(str(e))
+                return
+        self.signals.done.emit(result)
+
+    def onDone(self, result):
+        """GUI thread, deliver the result."""
+        tasks.discard(self)
+        if not self.cancelled:
+            self.callback(result)
+
+    def onFailed(self, message):
+        """GUI thread, report the error."""
+        tasks.discard(self)
+        App.Console.PrintWarning("Icon themes: background task failed (" +
+                                 message +
+                                 ").\n")
+
+    def cancel(self):
+        """Don't deliver the result."""
+        self.cancelled = True
+
+
+tasks = set()
+
+
+def start(function, args, callback, owner=None):
+    """Run function(*args) in the background, then callback(result).
+
+    If owner (a QObject) is destroyed or a dialog owner finishes, the
+    task is cancelled.
+    """
+    task = Task(function, args, callback)
+    tasks.add(task)
+
+    if owner is not None:
+        owner.destroyed.connect(task.cancel)
+        if hasattr(owner, "finished"):
+            owner.finished.connect(task.cancel)
+
+    QtCore.QThreadPool.globalInstance().start(task)
+
+    return task
@@ -0,0 +1,150 @@
+# Icon themes for FreeCAD
+# Copyright (C) 2016, 2017, 2018, 2019 triplus @ FreeCAD
+#
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+
+"""Legacy icon themes inside zip archives.
+
+A theme archive is used like a theme folder: "Icons/Theme.zip/" is the
+folder path and "Icons/Theme.zip/name.svg" an icon. The central
+directory is read once into a name index (SVG files anywhere in the
+archive, by file name), icons are decompressed when they are read.
+An archive is opened again when its modification time or size changes.
+"""
+
+
+import os
+import zipfile
+import threading
+
+archives = {}
+lock = threading.RLock()
+
+
+def stat(path):
+    """Return modification time and size of a file or None."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_mtime, st.st_size]
+
+
+def isArchive(path):
+    """Path names an existing zip archive (trailing separator allowed)."""
+    path = path.rstrip("/" + os.path.sep)
+    return path.lower().endswith(".zip") and os.path.isfile(path)
+
+
+def split(source):
+    """Archive path and member name of an icon inside an archive or None."""
+    lower = source.lower()
+
+    for sep in set(("/", os.path.sep)):
+        i = lower.find(".zip" + sep)
+        if i != -1:
+            return source[:i + 4], source[i + 5:]
+
+    return None
+
+
+class Archive(object):
+    """Open archive with an index of its SVG files."""
+
+    def __init__(self, path):
+        self.path = path
+        self.key = stat(path)
+        self.zip = zipfile.ZipFile(path)
+        self.index = {}
+
+        for info in self.zip.infolist():
+            name = info.filename.split("/")[-1]
+            if name.lower().endswith(".svg") and not info.is_dir():
+                self.index.setdefault(name, info)
+
+    def names(self):
+        """Icon names (without extension)."""
+        return frozenset(i[:-4] for i in self.index)
+
+    def read(self, member):
+        """Contents of an SVG file or None."""
+        info = self.index.get(member)
+
+        if info is None:
+            return None
+
+        with lock:
+            return self.zip.read(info)
+
+    def close(self):
+        """Close the archive file."""
+        self.zip.close()
+
+
+def archive(path):
+    """Archive of a path, opened once and again when it changes."""
+    path = path.rstrip("/" + os.path.sep)
+
+    with lock:
+        current = archives.get(path)
+
+        if (current is not None and
+                current.key == stat(path)):
+            return current
+
+        if current is not None:
+            current.close()
+            del archives[path]
+
+        try:
+            archives[path] = Archive(path)
+        except (IOError, OSError, zipfile.BadZipfile):
+            return None
+
+        return archives[path]
+
+
+def names(path):
+    """Icon names inside an archive."""
+    a = archive(path)
+
+    if a is None:
+        return frozenset()
+    return a.names()
+
+
+def read(path, member):
+    """Contents of an icon inside an archive, b"" if missing."""
+    a = archive(path)
+
+    if a is None:
+        return b""
+
+    try:
+        data = a.read(member)
+    except (IOError, OSError, zipfile.BadZipfile):
+        data = None
+
+    return data or b""
+
+
+def fingerprint(source):
+    """Fingerprint of the archive holding an icon, or of the icon file."""
+    parts = split(source)
+
+    if parts:
+        return stat(parts[0])
+    return stat(source)
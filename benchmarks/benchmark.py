@@ -0,0 +1,399 @@
+# Icon themes for FreeCAD
+# Copyright (C) 2016, 2017, 2018, 2019 triplus @ FreeCAD
+#
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+
+"""Headless icon themes benchmarks.
+
+Runs the modules without FreeCAD, under the offscreen Qt platform, with
+small FreeCAD and FreeCADGui stand-ins. Synthetic themes, .rcc packs and
+main windows full of actions are generated in a temporary folder. Every
+scenario runs in a fresh process so module state doesn't leak between
+runs. Results are written as JSON. The exit status is 1 if a scenario
+fails or, compared with earlier results, a timing got slower than the
+threshold allows.
+
+    python benchmarks/benchmark.py --output results.json
+    python benchmarks/benchmark.py --quick
+    python benchmarks/benchmark.py --baseline results.json --threshold 1.5
+"""
+
+
+import os
+import sys
+import json
+import time
+import types
+import shutil
+import tempfile
+import argparse
+import importlib
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = [
+    {"icons": 10, "packs": 1, "actions": 1000},
+    {"icons": 1000, "packs": 1, "actions": 1000},
+    {"icons": 10000, "packs": 1, "actions": 5000},
+    {"icons": 100, "packs": 10, "actions": 1000},
+    {"icons": 100, "packs": 50, "actions": 1000},
+    {"icons": 1000, "packs": 1, "actions": 10000},
+]
+
+QUICK = [
+    {"icons": 10, "packs": 1, "actions": 200},
+    {"icons": 200, "packs": 5, "actions": 1000},
+]
+
+
+def pysideShim():
+    """Provide the FreeCAD style PySide module (QtGui with widgets)."""
+    try:
+        import PySide
+        PySide.QtGui
+        return
+    except (ImportError, AttributeError):
+        pass
+
+    for name in ("PySide2", "PySide6"):
+        try:
+            QtCore = importlib.import_module(name + ".QtCore")
+            QtGui = importlib.import_module(name + ".QtGui")
+            QtWidgets = importlib.import_module(name + ".QtWidgets")
+            QtSvg = importlib.import_module(name + ".QtSvg")
+            break
+        except ImportError:
+            continue
+    else:
+        raise SystemExit("PySide2 or PySide6 is required")
+
+    gui = types.ModuleType("PySide.QtGui")
+    for source in (QtGui, QtWidgets):
+        for attr in dir(source):
+            if not attr.startswith("__"):
+                setattr(gui, attr, getattr(source, attr))
+
+    module = types.ModuleType("PySide")
+    module.QtCore = QtCore
+    module.QtGui = gui
+    module.QtSvg = QtSvg
+
+    sys.modules["PySide"] = module
+    sys.modules["PySide.QtCore"] = QtCore
+    sys.modules["PySide.QtGui"] = gui
+    sys.modules["PySide.QtSvg"] = QtSvg
+
+
+class ParamGroup(object):
+    """In memory stand-in for a FreeCAD parameter group."""
+
+    def __init__(self):
+        self.values = {}
+
+    def get(self, kind, name, default):
+        return self.values.get((kind, name), default)
+
+    def GetString(self, name, default=""):
+        return self.get("s", name, default)
+
+    def SetString(self, name, value):
+        self.values[("s", name)] = value
+
+    def RemString(self, name):
+        self.values.pop(("s", name), None)
+
+    def GetBool(self, name, default=False):
+        return self.get("b", name, default)
+
+    def SetBool(self, name, value):
+        self.values[("b", name)] = bool(value)
+
+    def GetInt(self, name, default=0):
+        return self.get("i", name, default)
+
+    def SetInt(self, name, value):
+        self.values[("i", name)] = int(value)
+
+
+class Console(object):
+    """Collects console messages."""
+
+    def __init__(self):
+        self.messages = []
+
+    def PrintLog(self, text):
+        self.messages.append(text)
+
+    PrintMessage = PrintLog
+    PrintWarning = PrintLog
+    PrintError = PrintLog
+
+
+def freecadStubs(data, mw):
+    """Install FreeCAD and FreeCADGui stand-ins."""
+    params = {}
+
+    def ParamGet(path):
+        return params.setdefault(path, ParamGroup())
+
+    app = types.ModuleType("FreeCAD")
+    app.ParamGet = ParamGet
+    app.Console = Console()
+    app.getUserAppDataDir = lambda: data
+    app.Version = lambda: ["0", "19", "0"]
+
+    gui = types.ModuleType("FreeCADGui")
+    gui.getMainWindow = lambda: mw
+
+    sys.modules["FreeCAD"] = app
+    sys.modules["FreeCADGui"] = gui
+
+    return app, gui
+
+
+def svg(index):
+    """Synthetic icon."""
+    return ('<svg xmlns="http://www.w3.org/2000/svg" width="64" '
+            'height="64" viewBox="0 0 64 64">'
+            '<circle cx="32" cy="32" r="%d" fill="#%06x"/></svg>'
+            % (8 + index % 24, (index * 2654435761) % 0xffffff)).encode()
+
+
+def makeThemes(data, icons, packs):
+    """Legacy theme folders and .rcc packs in Gui/Icons."""
+    import IconThemesRcc
+
+    path = os.path.join(data, "Gui", "Icons")
+    os.makedirs(path)
+
+    for name, offset in (("Bench", 0), ("Bench2", icons // 2)):
+        folder = os.path.join(path, name)
+        os.makedirs(folder)
+        for i in range(icons):
+            with open(os.path.join(folder, "Cmd_%d.svg" % i), "wb") as f:
+                f.write(svg(i + offset))
+
+    for k in range(packs):
+        files = {"/icons/Bench%d/index.theme" % k: (
+            "[Icon Theme]\nName=Bench %d\nInherits=FreeCAD-default\n"
+            "Directories=scalable\n\n[scalable]\nSize=64\n"
+            "Type=Scalable\nMinSize=1\nMaxSize=256\n" % k).encode()}
+        for i in range(icons):
+            files["/icons/Bench%d/scalable/Cmd_%d.svg" % (k, i)] = svg(i)
+        with open(os.path.join(path, "pack%d.rcc" % k), "wb") as f:
+            f.write(IconThemesRcc.build(files))
+
+    return ["pack%d.rcc" % k for k in range(packs)]
+
+
+def addActions(mw, start, count):
+    """Add actions the way FreeCAD commands do (QAction in a holder)."""
+    from PySide import QtGui
+    from PySide import QtCore
+
+    for i in range(start, start + count):
+        holder = QtCore.QObject(mw)
+        a = QtGui.QAction(holder)
+        a.setObjectName("Cmd_%d" % i)
+        a.setText("Command %d" % i)
+
+
+def settle(app):
+    """Finish background work and deliver queued events."""
+    from PySide import QtCore
+
+    for i in range(3):
+        QtCore.QThreadPool.globalInstance().waitForDone()
+        app.processEvents()
+
+
+def timed(results, name, function, *args):
+    """Record the wall time of a call."""
+    start = time.perf_counter()
+    value = function(*args)
+    results[name] = time.perf_counter() - start
+    return value
+
+
+def scenario(icons, packs, actions):
+    """Run one scenario in this process, return timings."""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    sys.path.insert(0, ROOT)
+    pysideShim()
+
+    from PySide import QtGui
+    from PySide import QtCore
+
+    app = QtGui.QApplication.instance() or QtGui.QApplication([])
+
+    class MainWindow(QtGui.QMainWindow):
+        workbenchActivated = QtCore.Signal(str)
+
+    mw = MainWindow()
+    data = tempfile.mkdtemp(prefix="iconthemes-bench-") + os.path.sep
+    results = {}
+
+    try:
+        App, Gui = freecadStubs(data, mw)
+        files = makeThemes(data, icons, packs)
+        addActions(mw, 0, actions)
+
+        p = App.ParamGet("User parameter:BaseApp/IconThemes")
+        p.SetString("Registered", ",".join(files))
+        p.SetString("Theme", "Bench0")
+        p.SetString("ThemeFolder", "Bench")
+
+        gui = timed(results, "importGui", importlib.import_module,
+                    "IconThemesGui")
+        import IconThemesStartup
+
+        results["registerOnStart"] = IconThemesStartup.timings["register"]
+        results["setThemeOnStart"] = IconThemesStartup.timings["theme"]
+        timed(results, "iconThemesNamesCold", gui.iconThemesNames)
+        timed(results, "iconThemesNames", gui.iconThemesNames)
+
+        timed(results, "importLegacy", importlib.import_module,
+              "IconThemesLegacy")
+        timed(results, "startup", settle, app)
+        results["applyIcons"] = IconThemesStartup.timings.get("apply", 0)
+
+        addActions(mw, actions, max(1, actions // 10))
+        timed(results, "workbenchSwitch",
+              mw.workbenchActivated.emit, "Bench")
+
+        def openGuiDialog():
+            dialog = gui.prefDialog()
+            settle(app)
+            return dialog
+
+        dialog = timed(results, "prefDialog", openGuiDialog)
+        dialog.done(1)
+        settle(app)
+
+        def openLegacyDialog():
+            mw.findChild(QtGui.QAction, "IconThemesLegacy").trigger()
+            settle(app)
+
+        timed(results, "prefDialogLegacy", openLegacyDialog)
+
+        comboBox = None
+        for d in mw.findChildren(QtGui.QDialog):
+            comboBox = comboBox or d.findChild(QtGui.QComboBox)
+
+        def switch(text):
+            comboBox.setCurrentIndex(comboBox.findText(text))
+            settle(app)
+
+        timed(results, "onTheme", switch, "Bench2")
+        timed(results, "resetIcons", switch, "Default")
+    finally:
+        mw.deleteLater()
+        settle(app)
+        shutil.rmtree(data, ignore_errors=True)
+
+    return results
+
+
+def regressions(report, baseline, threshold, minimum=0.005):
+    """Timings slower than threshold times the baseline.
+
+    Scenarios are matched by their configuration, differences below the
+    minimum (seconds) are ignored as noise.
+    """
+    found = []
+    earlier = {}
+    for entry in baseline.get("results", []):
+        config = tuple(entry.get(i) for i in ("icons", "packs", "actions"))
+        earlier[config] = entry.get("timings", {})
+
+    for entry in report["results"]:
+        config = tuple(entry.get(i) for i in ("icons", "packs", "actions"))
+        timings = earlier.get(config, {})
+        for name, value in sorted(entry.get("timings", {}).items()):
+            before = timings.get(name)
+            if (before is not None and
+                    value > before * threshold and
+                    value - before > minimum):
+                found.append([config, name, before, value])
+
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--output", help="write JSON results to a file")
+    parser.add_argument("--quick", action="store_true",
+                        help="small scenarios only")
+    parser.add_argument("--baseline",
+                        help="compare with JSON results of an earlier run")
+    parser.add_argument("--threshold", type=float, default=1.5,
+                        help="allowed slowdown against the baseline")
+    parser.add_argument("--scenario", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.scenario:
+        config = json.loads(args.scenario)
+        print(json.dumps(scenario(**config)))
+        return 0
+
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    report = {"python": sys.version.split()[0], "results": []}
+
+    for config in (QUICK if args.quick else SCENARIOS):
+        out = subprocess.run([sys.executable,
+                              os.path.abspath(__file__),
+                              "--scenario",
+                              json.dumps(config)],
+                             env=env,
+                             stdout=subprocess.PIPE,
+                             universal_newlines=True)
+        entry = dict(config)
+        if out.returncode == 0:
+            entry["timings"] = json.loads(out.stdout.strip().splitlines()[-1])
+        else:
+            entry["error"] = out.returncode
+        report["results"].append(entry)
+
+        print(json.dumps(entry, sort_keys=True))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=1, sort_keys=True)
+
+    status = 0
+    failed = [i for i in report["results"] if "error" in i]
+    if failed:
+        sys.stderr.write(str(len(failed)) + " scenarios failed\n")
+        status = 1
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        for config, name, before, value in regressions(report,
+                                                       baseline,
+                                                       args.threshold):
+            sys.stderr.write("Slower " + name + " " +
+                             json.dumps(list(config)) + ": " +
+                             "%.1f" % (before * 1000) + " -> " +
+                             "%.1f" % (value * 1000) + " ms\n")
+            status = 1
+
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+# Icon themes for FreeCAD
+# Copyright (C) 2016, 2017, 2018, 2019 triplus @ FreeCAD
+#
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+
+"""Tests of the icon themes modules.
+
+Qt is used through the PySide shim of the benchmarks, tests needing it
+are skipped if neither PySide2 nor PySide6 is installed. Modules that
+need FreeCAD run against the FreeCAD stand-ins of the benchmarks.
+"""
+
+
+import os
+import sys
+import types
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import benchmark
+
+
+@pytest.fixture(scope="session")
+def qt():
+    """FreeCAD style PySide module with a headless application."""
+    try:
+        benchmark.pysideShim()
+    except SystemExit:
+        pytest.skip("PySide2 or PySide6 is required")
+
+    import PySide
+
+    if not PySide.QtGui.QApplication.instance():
+        PySide.app = PySide.QtGui.QApplication(["IconThemes"])
+    return PySide
+
+
+@pytest.fixture
+def demo():
+    """Paths of the demo themes shipped with the module."""
+    return {"rcc": os.path.join(ROOT, "demo.rcc"),
+            "theme": os.path.join(ROOT, "demo-rcc-assets"),
+            "zip": os.path.join(ROOT, "DemoTheme.zip")}
+
+
+@pytest.fixture
+def freecad(qt, tmp_path):
+    """FreeCAD stand-ins with a main window and an empty user data folder.
+
+    Modules that need FreeCAD are imported afresh by every test, the
+    legacy module starts when it is imported. Resources registered by
+    the modules are released afterwards.
+    """
+    QtGui = qt.QtGui
+    QtCore = qt.QtCore
+
+    class MainWindow(QtGui.QMainWindow):
+        workbenchActivated = QtCore.Signal(str)
+
+    saved = {}
+    for name in list(sys.modules):
+        if name.startswith(("IconThemes", "FreeCAD")):
+            saved[name] = sys.modules.pop(name)
+
+    mw = MainWindow()
+    data = str(tmp_path) + os.path.sep
+    App, Gui = benchmark.freecadStubs(data, mw)
+    env = types.SimpleNamespace(
+        App=App,
+        Gui=Gui,
+        mw=mw,
+        data=data,
+        icons=os.path.join(data, "Gui", "Icons"),
+        p=App.ParamGet("User parameter:BaseApp/IconThemes"),
+        settle=lambda: benchmark.settle(QtGui.QApplication.instance()))
+
+    yield env
+
+    gui = sys.modules.get("IconThemesGui")
+    if gui is not None:
+        env.p.RemString("LegacyBackend")
+        gui.setThemeName("")
+        for user in list(gui.users):
+            gui.useResources(user, ())
+
+    mw.deleteLater()
+    env.settle()
+
+    for name in list(sys.modules):
+        if name.startswith(("IconThemes", "FreeCAD")):
+            del sys.modules[name]
+    sys.modules.update(saved)
+
@@ -0,0 +1,74 @@
+# Icon themes for FreeCAD
+# Copyright (C) 2016, 2017, 2018, 2019 triplus @ FreeCAD
+#
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+
+"""Registry of main window actions and default icons."""
+
+
+import benchmark
+
+
+def testRegistry(qt):
+    import IconThemesActions
+
+    mw = qt.QtGui.QMainWindow()
+    benchmark.addActions(mw, 0, 5)
+    registry = IconThemesActions.ActionRegistry(mw)
+
+    assert sorted(registry.actions()) == ["Cmd_%d" % i for i in range(5)]
+    generation = registry.generation
+    registry.actions()
+    assert registry.generation == generation
+
+    benchmark.addActions(mw, 5, 2)
+    benchmark.addActions(mw, 0, 1)
+    actions = registry.actions()
+    assert registry.generation != generation
+    assert "Cmd_6" in actions and "Cmd_0" not in actions
+    assert registry.duplicates == set(["Cmd_0"])
+    assert (set(registry.actions()) ==
+            set(IconThemesActions.collect(mw)) - registry.duplicates)
+
+    holder = actions["Cmd_6"].parent()
+    holder.setParent(None)
+    assert "Cmd_6" not in registry.actions()
+    mw.deleteLater()
+
+
+def testDefaultIcons(qt):
+    import IconThemesActions
+
+    QtGui = qt.QtGui
+    red = QtGui.QPixmap(4, 4)
+    red.fill(qt.QtCore.Qt.red)
+    derived = []
+
+    def derive(name):
+        derived.append(name)
+        return QtGui.QIcon(red)
+
+    icons = IconThemesActions.DefaultIcons(derive)
+    kept = QtGui.QIcon(red)
+    icons.store("a", kept)
+    icons.store("b", kept)
+    icons.store("c", QtGui.QIcon(), True)
+    assert len(icons) == 3 and derived == []
+
+    assert icons.footprint() == {"defaults": 3, "derived": 1, "kept": 1}
+    assert icons.pop("a").cacheKey() == kept.cacheKey()
+    assert not icons.pop("c").isNull()
+    assert derived == ["c"] and "c" not in icons
@@ -0,0 +1,79 @@
+# Icon themes for FreeCAD
+# Copyright (C) 2016, 2017, 2018, 2019 triplus @ FreeCAD
+#
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+
+"""Rendered icon cache and the SVG icon engine."""
+
+
+import os
+import benchmark
+
+
+def testImage(freecad):
+    import IconThemesCache
+
+    data = benchmark.svg(1)
+    first = IconThemesCache.image(data, 16)
+    second = IconThemesCache.image(data, 16)
+    large = IconThemesCache.image(data, 16, 2.0)
+
+    assert second.convertToFormat(first.format()) == first
+    assert large.width() == 32 and large.devicePixelRatio() == 2.0
+    assert IconThemesCache.stats()["hits"] == 1
+    assert IconThemesCache.stats()["misses"] == 2
+    assert sorted(os.listdir(IconThemesCache.cachePath())) == sorted(
+        IconThemesCache.fileName(IconThemesCache.digest(data), 16, i)
+        for i in (1.0, 2.0))
+
+
+def testEvict(freecad):
+    freecad.p.SetInt("CacheSize", 0)
+
+    import IconThemesCache
+
+    IconThemesCache.image(benchmark.svg(1), 16)
+    assert IconThemesCache.stats()["files"] == 0
+    assert IconThemesCache.stats()["evicted"] == 1
+
+
+def testEngine(freecad, tmp_path):
+    import IconThemesCache
+    from PySide import QtGui
+    from PySide import QtCore
+
+    path = str(tmp_path / "a.svg")
+    with open(path, "wb") as f:
+        f.write(benchmark.svg(2))
+
+    icon = IconThemesCache.icon(path)
+    engine = IconThemesCache.SvgIconEngine(path)
+    assert engine.data is None
+
+    pixmap = icon.pixmap(16, 16)
+    assert pixmap.toImage() == IconThemesCache.render(benchmark.svg(2), 16)
+    assert IconThemesCache.knownKey(path) == IconThemesCache.digest(
+        benchmark.svg(2))
+
+    engine.key = IconThemesCache.knownKey(path)
+    engine.pixmap(pixmap.size(), QtGui.QIcon.Normal, QtGui.QIcon.Off)
+    assert engine.data is None
+
+    hidpi = engine.scaledPixmap(QtCore.QSize(16, 16),
+                                QtGui.QIcon.Normal,
+                                QtGui.QIcon.Off,
+                                2.0)
+    assert hidpi.width() == 32 and hidpi.devicePixelRatio() == 2.0
@@ -0,0 +1,64 @@
+# Icon themes for FreeCAD
+# Copyright (C) 2016, 2017, 2018, 2019 triplus @ FreeCAD
+#
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+
+"""Theme catalog of resource files."""
+
+
+import os
+import json
+import benchmark
+
+
+def testNames(freecad):
+    files = benchmark.makeThemes(freecad.data, 4, 2)
+    freecad.p.SetString("Registered", ",".join(files))
+    freecad.p.SetString("Theme", "Bench0")
+
+    import IconThemesGui
+    import IconThemesCatalog
+    from PySide import QtCore
+
+    names = IconThemesGui.iconThemesNames()
+    assert ["Bench 0", "Bench0"] in names
+    assert ["Bench 1", "Bench1"] in names
+    assert QtCore.QDir(":/icons/Bench0").exists()
+    assert not QtCore.QDir(":/icons/Bench1").exists()
+
+    with open(IconThemesCatalog.catalogFile()) as f:
+        catalog = json.load(f)
+    path = os.path.join(freecad.icons, "pack1.rcc")
+    assert catalog[path]["themes"][0]["folder"] == "Bench1"
+    assert catalog[path]["key"] == IconThemesCatalog.fingerprint(path)
+
+
+def testStale(freecad):
+    benchmark.makeThemes(freecad.data, 4, 1)
+    path = os.path.join(freecad.icons, "pack0.rcc")
+
+    import IconThemesCatalog
+    import IconThemesRcc
+
+    assert IconThemesCatalog.inspect(path)["themes"][0]["name"] == "Bench 0"
+    assert IconThemesCatalog.fresh(path) is not None
+
+    with open(path, "wb") as f:
+        f.write(IconThemesRcc.build({"/icons/New/index.theme":
+                                     b"[Icon Theme]\nName=New theme\n"}))
+    os.utime(path, (1, 1))
+    assert IconThemesCatalog.fresh(path) is None
+    assert IconThemesCatalog.inspect(path)["themes"][0]["name"] == "New theme"
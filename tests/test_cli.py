@@ -0,0 +1,66 @@
+# Icon themes for FreeCAD
+# Copyright (C) 2016, 2017, 2018, 2019 triplus @ FreeCAD
+#
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+
+"""Command line tool."""
+
+
+import json
+import IconThemesCli
+import IconThemesRcc
+
+
+def run(capsys, *argv):
+    status = IconThemesCli.main(["--json"] + list(argv))
+    return status, json.loads(capsys.readouterr().out)
+
+
+def testList(capsys, demo):
+    status, data = run(capsys, "list", demo["rcc"], demo["theme"], demo["zip"])
+    assert status == 0
+    assert [i["kind"] for i in data] == ["rcc", "theme", "zip"]
+    assert data[2]["icons"] == 7
+
+
+def testValidate(capsys, demo, tmp_path):
+    status, data = run(capsys, "validate", demo["rcc"], demo["theme"])
+    assert status == 0 and not any(data.values())
+
+    with open(demo["rcc"], "rb") as f:
+        (tmp_path / "broken.rcc").write_bytes(f.read()[:40])
+    assert IconThemesCli.main(["validate", str(tmp_path / "broken.rcc")]) == 1
+    assert IconThemesCli.main(["validate", demo["theme"]]) == 0
+
+
+def testCompile(capsys, demo, tmp_path):
+    output = str(tmp_path / "demo.rcc")
+    status, data = run(capsys, "compile", "--format-version", "2",
+                       "--output", output, demo["theme"])
+    assert status == 0 and data[0]["output"] == output
+    assert [i["name"] for i in IconThemesRcc.themes(output)] == ["Demo"]
+
+
+def testOptimize(capsys, demo, tmp_path):
+    output = str(tmp_path / "optimized")
+    status, data = run(capsys, "optimize", "--workers", "1",
+                       "--output", output, demo["theme"])
+    assert status == 0
+    assert data[0]["after"] < data[0]["before"]
+
+    status, data = run(capsys, "list", output)
+    assert status == 0
+    assert [(i["kind"], i["name"]) for i in data] == [("theme", "Demo")]
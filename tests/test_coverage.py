@@ -0,0 +1,62 @@
+# Icon themes for FreeCAD
+# Copyright (C) 2016, 2017, 2018, 2019 triplus @ FreeCAD
+#
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+
+"""Command coverage of themes."""
+
+
+import IconThemesCoverage
+
+
+def testAnalyze():
+    actions = {"Std_A": "a", "Std_B": "b", "Std_C": "c"}
+    result = IconThemesCoverage.analyze(actions,
+                                        frozenset(["a", "c", "x", "Std_D"]),
+                                        ["Std_D"])
+    assert result["covered"] == [["Std_A", "a"], ["Std_C", "c"]]
+    assert result["missing"] == [["Std_B", "b"]]
+    assert result["unused"] == ["x"]
+    assert result["duplicates"] == [["Std_D", True]]
+    assert abs(result["coverage"] - 2.0 / 3) < 1e-9
+
+
+def testInherited():
+    actions = {"Std_A": "a", "Std_B": "b"}
+    result = IconThemesCoverage.analyze(actions,
+                                        frozenset(["a"]),
+                                        inherited=frozenset(["b", "y"]))
+    assert result["missing"] == []
+    assert result["unused"] == []
+
+
+def testEmpty():
+    assert IconThemesCoverage.analyze({}, frozenset())["coverage"] == 0.0
+
+
+def testThemeIcons(demo):
+    assert "Std_ViewTop" in IconThemesCoverage.themeIcons(demo["zip"])
+    assert "view-top" in IconThemesCoverage.themeIcons(demo["theme"])
+
+
+def testWriteRead(tmp_path):
+    result = IconThemesCoverage.analyze({"Std_A": "a", "Std_B": "b"},
+                                        frozenset(["a", "x"]))
+    for name in ("coverage.csv", "coverage.json"):
+        path = str(tmp_path / name)
+        IconThemesCoverage.write(result, path)
+        actions, duplicates = IconThemesCoverage.readActions(path)
+        assert actions == {"Std_A": "a", "Std_B": "b"}
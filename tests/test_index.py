@@ -0,0 +1,114 @@
+# Icon themes for FreeCAD
+# Copyright (C) 2016, 2017, 2018, 2019 triplus @ FreeCAD
+#
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+
+"""index.theme parsing and validation."""
+
+
+import os
+import IconThemesIndex
+
+INDEX = b"""[Icon Theme]
+Name=Test
+Comment=Test theme
+Inherits=FreeCAD-default,hicolor
+Directories=16x16,scalable
+
+[16x16]
+Size=16
+
+[scalable]
+Size=64
+Type=Scalable
+MinSize=1
+MaxSize=256
+"""
+
+
+def testParse():
+    theme = IconThemesIndex.parse(INDEX, "folder")
+    assert theme.name == "Test"
+    assert theme.inherits == ["FreeCAD-default", "hicolor"]
+    assert [d.name for d in theme.directories] == ["16x16", "scalable"]
+
+
+def testParseInvalid():
+    assert IconThemesIndex.parse(b"") is None
+    assert IconThemesIndex.parse(b"[Icon Theme]\nComment=x\n") is None
+
+
+def testValidate(demo):
+    with open(os.path.join(demo["theme"], "index.theme"), "rb") as f:
+        assert IconThemesIndex.validate(f.read()) == []
+    assert IconThemesIndex.validate(INDEX) == []
+
+
+def testValidateProblems():
+    assert IconThemesIndex.validate(b"\xff") == ["not UTF-8 encoded"]
+    assert IconThemesIndex.validate(b"") == ["missing [Icon Theme] section"]
+
+    problems = IconThemesIndex.validate(INDEX.replace(b"Size=16",
+                                                      b"Size=x")
+                                        .replace(b"MinSize=1",
+                                                 b"MinSize=512")
+                                        .replace(b"Comment=Test theme\n",
+                                                 b""))
+    assert problems == ["missing Comment",
+                        "directory 16x16 has no valid Size",
+                        "directory scalable has MinSize > MaxSize"]
+
+
+def testChain():
+    inherits = {"A": ["B", "C"], "B": ["C", "A"], "C": ["Missing"]}
+    assert IconThemesIndex.chain("A", inherits.get) == ["A", "B", "C"]
+    assert IconThemesIndex.chain("Missing", inherits.get) == []
+
+
+def testDirectory():
+    theme = IconThemesIndex.parse(INDEX)
+    fixed, scalable = theme.directories
+    assert fixed.matches(17) and not fixed.matches(20)
+    assert fixed.distance(20) == 2
+    assert scalable.matches(256) and not scalable.matches(300)
+    assert scalable.distance(300) == 44
+
+
+def testResolve():
+    files = {("Test", "index.theme"): INDEX.replace(b"FreeCAD-default",
+                                                    b"Base"),
+             ("Base", "index.theme"): INDEX.replace(b"Inherits=", b"X=")}
+    listing = {("Test", "16x16"): ["a.png"],
+               ("Test", "scalable"): ["a.svg"],
+               ("Base", "scalable"): ["a.svg", "b.svg", "readme.txt"]}
+    listed = []
+
+    def listDir(folder, directory):
+        listed.append((folder, directory))
+        return listing.get((folder, directory), [])
+
+    themes = IconThemesIndex.Themes(lambda *i: files.get(i), listDir)
+    assert themes.chain("Test") == ["Test", "Base"]
+    assert themes.resolve("Test", "a", 16) == ("Test", "16x16", "a.png")
+    assert themes.resolve("Test", "a", 48) == ("Test", "scalable", "a.svg")
+    assert themes.resolve("Test", "b", 16) == ("Base", "scalable", "b.svg")
+    assert themes.resolve("Test", "c") is None
+    assert themes.names("Test") == frozenset(["a", "b"])
+    assert len(listed) == 4
+
+    themes.clear()
+    themes.resolve("Test", "a")
+    assert len(listed) == 6
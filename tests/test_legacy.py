@@ -0,0 +1,241 @@
+# Icon themes for FreeCAD
+# Copyright (C) 2016, 2017, 2018, 2019 triplus @ FreeCAD
+#
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+
+"""Legacy theme folders applied to the main window actions."""
+
+
+import os
+import json
+import time
+import shutil
+import pytest
+import benchmark
+
+
+def action(mw, name):
+    """Main window action by object name."""
+    from PySide import QtGui
+
+    return mw.findChild(QtGui.QAction, name)
+
+
+def rendered(icon):
+    """Image of an icon at 16 pixels."""
+    return icon.pixmap(16, 16).toImage()
+
+
+def svgImage(data):
+    """Image of SVG data at 16 pixels."""
+    import IconThemesCache
+
+    return IconThemesCache.render(data, 16)
+
+
+def wait(freecad, condition, timeout=5):
+    """Process events until condition() is true or the time is up."""
+    from PySide import QtCore
+
+    end = time.time() + timeout
+    while not condition() and time.time() < end:
+        freecad.settle()
+        QtCore.QThread.msleep(20)
+    return condition()
+
+
+def start(freecad, folder):
+    """Start the legacy module with a theme folder."""
+    freecad.p.SetString("ThemeFolder", folder)
+
+    import IconThemesLegacy
+
+    freecad.settle()
+    return IconThemesLegacy
+
+
+def testApply(freecad):
+    benchmark.makeThemes(freecad.data, 10, 0)
+    benchmark.addActions(freecad.mw, 0, 15)
+    start(freecad, "Bench")
+
+    for i in range(10):
+        icon = action(freecad.mw, "Cmd_%d" % i).icon()
+        assert rendered(icon) == svgImage(benchmark.svg(i))
+    for i in range(10, 15):
+        assert action(freecad.mw, "Cmd_%d" % i).icon().isNull()
+
+
+def testHotReload(freecad):
+    benchmark.makeThemes(freecad.data, 10, 0)
+    benchmark.addActions(freecad.mw, 0, 5)
+    start(freecad, "Bench")
+
+    edited = action(freecad.mw, "Cmd_3")
+    other = action(freecad.mw, "Cmd_4").icon().cacheKey()
+    assert rendered(edited.icon()) == svgImage(benchmark.svg(3))
+    time.sleep(0.05)
+
+    # Written in place, the folder itself doesn't change.
+    with open(os.path.join(freecad.icons, "Bench", "Cmd_3.svg"), "r+b") as f:
+        f.write(benchmark.svg(99))
+        f.truncate()
+
+    assert wait(freecad, lambda: (rendered(edited.icon()) ==
+                                  svgImage(benchmark.svg(99))))
+    assert action(freecad.mw, "Cmd_4").icon().cacheKey() == other
+
+    os.remove(os.path.join(freecad.icons, "Bench", "Cmd_4.svg"))
+    assert wait(freecad, lambda: action(freecad.mw,
+                                        "Cmd_4").icon().isNull())
+
+
+def testSwitch(freecad):
+    from PySide import QtGui
+    from PySide import QtCore
+
+    benchmark.makeThemes(freecad.data, 10, 0)
+    os.remove(os.path.join(freecad.icons, "Bench2", "Cmd_5.svg"))
+    benchmark.addActions(freecad.mw, 0, 12)
+    pixmap = QtGui.QPixmap(16, 16)
+    pixmap.fill(QtCore.Qt.red)
+    defaults = {}
+    for i in range(12):
+        a = action(freecad.mw, "Cmd_%d" % i)
+        a.setIcon(QtGui.QIcon(pixmap))
+        defaults[i] = a.icon().cacheKey()
+    start(freecad, "Bench")
+
+    action(freecad.mw, "IconThemesLegacy").trigger()
+    freecad.settle()
+    comboBox = freecad.mw.findChildren(QtGui.QDialog)[0].findChild(
+        QtGui.QComboBox)
+
+    def switch(text):
+        comboBox.setCurrentIndex(comboBox.findText(text))
+        freecad.settle()
+        return dict((i, action(freecad.mw, "Cmd_%d" % i).icon().cacheKey())
+                    for i in range(12))
+
+    icons = switch("Bench2")
+    for i in (0, 9):
+        icon = action(freecad.mw, "Cmd_%d" % i).icon()
+        assert rendered(icon) == svgImage(benchmark.svg(i + 5))
+    assert icons[5] == defaults[5]
+    assert icons[10] == defaults[10]
+
+    assert switch("Default") == defaults
+    assert switch("Bench")[5] != defaults[5]
+
+
+@pytest.mark.parametrize("stale", [False, True], ids=["valid", "stale"])
+def testManifest(freecad, stale):
+    benchmark.makeThemes(freecad.data, 10, 0)
+    benchmark.addActions(freecad.mw, 0, 5)
+
+    folder = os.path.join(freecad.icons, "Bench")
+    st = os.stat(folder)
+    key = [1, 1] if stale else [st.st_mtime, st.st_size]
+    os.makedirs(os.path.join(freecad.data, "IconThemes"))
+    with open(os.path.join(freecad.data, "IconThemes", "manifest.json"),
+              "w") as f:
+        json.dump({"format": 1,
+                   "legacy": {"folder": folder + os.path.sep,
+                              "fingerprints": {folder: key},
+                              "icons": ["Cmd_0"]}}, f)
+
+    start(freecad, "Bench")
+
+    themed = [not action(freecad.mw, "Cmd_%d" % i).icon().isNull()
+              for i in range(5)]
+    assert themed == [True] + [stale] * 4
+
+    import IconThemesManifest
+
+    entry = IconThemesManifest.get("legacy")
+    assert len(entry["icons"]) == (10 if stale else 1)
+
+
+def testZip(freecad, demo):
+    import zipfile
+    from PySide import QtGui
+    from PySide import QtCore
+
+    os.makedirs(freecad.icons)
+    shutil.copy(demo["zip"], freecad.icons)
+    holder = QtCore.QObject(freecad.mw)
+    for name in ("Std_ViewAxo", "Std_Other"):
+        a = QtGui.QAction(holder)
+        a.setObjectName(name)
+        a.setText(name)
+    start(freecad, "DemoTheme.zip")
+
+    with zipfile.ZipFile(demo["zip"]) as archive:
+        data = archive.read("Std_ViewAxo.svg")
+    icon = action(freecad.mw, "Std_ViewAxo").icon()
+    assert rendered(icon) == svgImage(data)
+    assert action(freecad.mw, "Std_Other").icon().isNull()
+    assert os.listdir(freecad.icons) == ["DemoTheme.zip"]
+
+
+def testWorkbench(freecad):
+    benchmark.makeThemes(freecad.data, 20, 0)
+    benchmark.addActions(freecad.mw, 0, 10)
+    start(freecad, "Bench")
+
+    benchmark.addActions(freecad.mw, 10, 5)
+    assert action(freecad.mw, "Cmd_12").icon().isNull()
+    freecad.mw.workbenchActivated.emit("Test")
+    freecad.settle()
+
+    icon = action(freecad.mw, "Cmd_12").icon()
+    assert rendered(icon) == svgImage(benchmark.svg(12))
+
+
+def testThemeBackend(freecad):
+    import types
+    from PySide import QtGui
+    from PySide import QtCore
+
+    pixmaps = dict(("Cmd_%d" % i, "Cmd_%d" % i) for i in range(5))
+
+    def command(name):
+        return types.SimpleNamespace(
+            getInfo=lambda: {"pixmap": pixmaps[name]})
+
+    freecad.Gui.Command = types.SimpleNamespace(get=command)
+    benchmark.makeThemes(freecad.data, 10, 0)
+    benchmark.addActions(freecad.mw, 0, 5)
+    freecad.p.SetString("LegacyBackend", "theme")
+    start(freecad, "Bench")
+
+    import IconThemesGui
+
+    index = ":/icons/Legacy-Bench/index.theme"
+    assert QtGui.QIcon.themeName() == "Legacy-Bench"
+    IconThemesGui.setThemeName("Other")
+    assert QtGui.QIcon.themeName() == "Legacy-Bench"
+    assert b"Inherits=Other" in bytes(
+        QtCore.QResource(index).uncompressedData())
+
+    pixmap = ":/icons/Legacy-Bench/scalable/pixmap-7.svg"
+    assert not QtCore.QFile.exists(pixmap)
+    benchmark.addActions(freecad.mw, 5, 5)
+    pixmaps.update(("Cmd_%d" % i, "/x/pixmap-%d.svg" % i)
+                   for i in range(5, 10))
+    freecad.mw.workbenchActivated.emit("Test")
+    freecad.settle()
+    assert QtCore.QFile.exists(pixmap)
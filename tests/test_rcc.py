@@ -0,0 +1,117 @@
+# Icon themes for FreeCAD
+# Copyright (C) 2016, 2017, 2018, 2019 triplus @ FreeCAD
+#
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+
+"""Resource files: building, reading and loading them in Qt."""
+
+
+import os
+import pytest
+import IconThemesRcc
+
+FILES = {
+    "/icons/Test/index.theme": b"[Icon Theme]\nName=Test\n",
+    "/icons/Test/scalable/a.svg": b"<svg>" + b"a" * 500 + b"</svg>",
+    "/icons/Test/scalable/b.svg": b"<svg>" + b"a" * 500 + b"</svg>",
+    "/icons/Test/scalable/c.svg": b"<svg/>",
+    "/other.txt": b"",
+}
+
+
+@pytest.mark.parametrize("version", [1, 2, 3])
+def testReader(version):
+    with IconThemesRcc.Reader(IconThemesRcc.build(FILES, version)) as reader:
+        assert sorted(reader.walk("/")) == sorted(FILES)
+        for path, data in FILES.items():
+            assert reader.read(path) == data
+        assert reader.listDir("/icons") == ["Test"]
+        assert reader.isDir("/icons/Test/scalable")
+
+
+def testSharedContents():
+    single = dict(FILES)
+    del single["/icons/Test/scalable/b.svg"]
+    shared = IconThemesRcc.build(FILES, threshold=0)
+    assert len(shared) - len(IconThemesRcc.build(single, threshold=0)) < 100
+
+
+def testUnsupportedVersion():
+    with pytest.raises(ValueError):
+        IconThemesRcc.build(FILES, 4)
+
+
+@pytest.mark.parametrize("version", [1, 2, 3])
+def testQResource(qt, tmp_path, version):
+    QtCore = qt.QtCore
+    path = str(tmp_path / ("test" + str(version) + ".rcc"))
+    with open(path, "wb") as f:
+        f.write(IconThemesRcc.build(FILES, version))
+
+    root = "/v" + str(version)
+    assert QtCore.QResource.registerResource(path, root)
+    try:
+        for name, data in FILES.items():
+            f = QtCore.QFile(":" + root + name)
+            assert f.open(QtCore.QIODevice.ReadOnly)
+            assert bytes(f.readAll()) == data
+            f.close()
+    finally:
+        QtCore.QResource.unregisterResource(path, root)
+
+
+def testTruncated():
+    data = IconThemesRcc.build(FILES)
+    for size in range(0, len(data), 7):
+        try:
+            with IconThemesRcc.Reader(data[:size]) as reader:
+                for path in reader.walk("/"):
+                    reader.read(path)
+        except (ValueError, KeyError):
+            pass
+
+
+def testCorrupt():
+    data = bytearray(IconThemesRcc.build(FILES))
+    for offset in range(0, len(data), 3):
+        corrupt = bytearray(data)
+        corrupt[offset] ^= 0xff
+        try:
+            with IconThemesRcc.Reader(bytes(corrupt)) as reader:
+                for path in reader.walk("/"):
+                    reader.read(path)
+        except (ValueError, KeyError):
+            pass
+
+
+def testThemes(demo):
+    themes = IconThemesRcc.themes(demo["rcc"])
+    assert [i["name"] for i in themes] == ["Demo"]
+    assert themes[0]["inherits"] == ["FreeCAD-default"]
+
+
+def testCompileTheme(demo, tmp_path):
+    output = str(tmp_path / "demo.rcc")
+    IconThemesRcc.compileTheme(demo["theme"], output)
+
+    with IconThemesRcc.Reader.open(output) as reader:
+        names = sorted(i.rsplit("/", 1)[-1] for i in reader.walk("/icons"))
+        with open(os.path.join(demo["theme"], "view-top.svg"), "rb") as f:
+            top = f.read()
+        assert reader.read("/icons/Demo/scalable/view-top.svg") == top
+
+    assert names == sorted(i for i in os.listdir(demo["theme"])
+                           if i.endswith((".svg", ".theme")))
@@ -0,0 +1,74 @@
+# Icon themes for FreeCAD
+# Copyright (C) 2016, 2017, 2018, 2019 triplus @ FreeCAD
+#
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+
+"""Icon store: importing themes, sharing files and collecting them."""
+
+
+import os
+import pytest
+import IconThemesRcc
+import IconThemesStore
+
+
+def testImport(demo, tmp_path):
+    data = str(tmp_path)
+    store = IconThemesStore.storePath(data)
+
+    rcc = IconThemesStore.importTheme(data, demo["rcc"])
+    assert [(i["name"], i["kind"]) for i in rcc] == [("Demo", "theme")]
+
+    assets = IconThemesStore.importTheme(data, demo["theme"], "Assets")[0]
+    copy = IconThemesStore.importTheme(data, demo["theme"], "Copy")[0]
+    assert (assets["name"], copy["name"]) == ("Assets", "Copy")
+    assert copy["added"] == 0 and copy["files"] == assets["files"]
+    assert len(os.listdir(store)) == rcc[0]["added"] + assets["added"]
+
+    legacy = IconThemesStore.importTheme(data, demo["zip"])[0]
+    assert legacy["kind"] == "legacy"
+    path = IconThemesStore.iconsPath(data) + "DemoTheme.icons"
+    assert "Std_ViewTop" in IconThemesStore.names(path)
+    assert IconThemesStore.source(store, path, "Std_ViewTop").startswith(store)
+    assert IconThemesStore.installed(data, "legacy") == [path]
+
+
+def testRefuseOverwrite(demo, tmp_path):
+    data = str(tmp_path)
+    IconThemesStore.importTheme(data, demo["rcc"])
+
+    with pytest.raises(ValueError):
+        IconThemesStore.importTheme(data, demo["theme"])
+
+    report = IconThemesStore.importTheme(data, demo["theme"], force=True)[0]
+    path = IconThemesStore.iconsPath(data) + "Demo.icons"
+    assert report["files"] == len(IconThemesStore.load(path)["files"])
+    assert IconThemesStore.collect(data) > 0
+
+
+def testBuild(demo, tmp_path):
+    data = str(tmp_path)
+    IconThemesStore.importTheme(data, demo["theme"])
+    path = IconThemesStore.iconsPath(data) + "Demo.icons"
+    store = IconThemesStore.manifestStore(path)
+
+    assert store == IconThemesStore.storePath(data)
+    assert [i["name"] for i in IconThemesStore.themes(store, path)] == ["Demo"]
+
+    with IconThemesRcc.Reader(IconThemesStore.build(store, path)) as reader:
+        with open(os.path.join(demo["theme"], "view-top.svg"), "rb") as f:
+            top = f.read()
+        assert reader.read("/icons/Demo/view-top.svg") == top
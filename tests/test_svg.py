@@ -0,0 +1,115 @@
+# Icon themes for FreeCAD
+# Copyright (C) 2016, 2017, 2018, 2019 triplus @ FreeCAD
+#
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+
+"""SVG optimization, rendered with Qt before and after."""
+
+
+import pytest
+import IconThemesSvg
+
+ARC = (b'<svg xmlns="http://www.w3.org/2000/svg" '
+       b'xmlns:inkscape="http://www.inkscape.org/namespaces/inkscape" '
+       b'width="32" height="32" viewBox="0 0 32 32">'
+       b'<metadata><title>Arc</title></metadata>'
+       b'<defs><linearGradient id="unused"/></defs>'
+       b'<path inkscape:label="arc" fill="#ff0000" '
+       b'd="M4.0000 16.0000a12.0000 12.0000 0 0124.0000 0z"/>'
+       b'<circle cx="16.00001" cy="8" r="3" stroke="#0000ff"/></svg>')
+
+STYLE = (b'<svg xmlns="http://www.w3.org/2000/svg" width="32" height="32" '
+         b'viewBox="0 0 32 32"><defs><style>.a{fill:#f00}</style>'
+         b'<linearGradient id="unused"/></defs>'
+         b'<rect class="a" x="4" y="4" width="24.00001" height="24"/></svg>')
+
+SCALED = (b'<svg xmlns="http://www.w3.org/2000/svg" width="32" height="32" '
+          b'viewBox="0 0 32 32"><metadata/>'
+          b'<g transform="matrix(0.00041,0,0,0.00041,0,0)">'
+          b'<rect x="0" y="0" width="78048.78" height="78048.78" '
+          b'fill="#00ff00"/></g></svg>')
+
+
+@pytest.mark.parametrize("text, result", [
+    ("M10 10a4 4 0 018 0z", "M10 10a4 4 0 0 1 8 0z"),
+    ("M.5.5L1.0001.5", "M0.5 0.5L1 0.5"),
+    ("M1,2 l-3-4", "M1 2l-3-4"),
+    ("a1 1 0 1 0 2 2 1 1 0 002 2", "a1 1 0 1 0 2 2 1 1 0 0 0 2 2"),
+    ("M1 2 ?", "M1 2 ?"),
+])
+def testRoundPath(text, result):
+    assert IconThemesSvg.roundPath(text, 3) == result
+
+
+def testRoundNumbers():
+    assert IconThemesSvg.roundNumbers("1.23456,7.0", 2) == "1.23,7"
+    assert IconThemesSvg.roundNumbers("1.5.5", 3) == "1.5 0.5"
+    assert (IconThemesSvg.roundNumbers("matrix(0.00041,0,0,0.000412345)", 3)
+            == "matrix(0.00041,0,0,0.000412)")
+
+
+def testOptimize():
+    result = IconThemesSvg.optimize(ARC)
+    assert len(result) < len(ARC)
+    assert b"metadata" not in result and b"inkscape" not in result
+    assert b"unused" not in result
+    assert b'd="M4 16a12 12 0 0 1 24 0z"' in result
+
+
+def testInvalid():
+    assert IconThemesSvg.optimize(b"<svg") == b"<svg"
+
+
+def render(qt, data, size=64):
+    renderer = qt.QtSvg.QSvgRenderer(qt.QtCore.QByteArray(data))
+    assert renderer.isValid()
+    image = qt.QtGui.QImage(size, size, qt.QtGui.QImage.Format_ARGB32)
+    image.fill(0)
+    painter = qt.QtGui.QPainter(image)
+    renderer.render(painter)
+    painter.end()
+    return image
+
+
+@pytest.mark.parametrize("data, x, y, color", [
+    (ARC, 32, 24, 0xffff0000),
+    (STYLE, 32, 32, 0xffff0000),
+    (SCALED, 16, 16, 0xff00ff00),
+], ids=["arc", "style", "scaled"])
+def testRender(qt, data, x, y, color):
+    optimized = IconThemesSvg.optimize(data)
+    assert len(optimized) < len(data)
+
+    before = render(qt, data)
+    after = render(qt, optimized)
+    assert before == after
+    assert before.pixel(x, y) == color
+
+
+def testKeepStyle():
+    result = IconThemesSvg.optimize(STYLE)
+    assert b".a{fill:#f00}" in result and b"unused" not in result
+
+
+def testOptimizeFolder(tmp_path):
+    (tmp_path / "a.svg").write_bytes(ARC)
+    (tmp_path / "b.svg").write_bytes(b"<svg/>")
+
+    report = IconThemesSvg.optimizeFolder(str(tmp_path), workers=1)[0]
+    assert report["files"] == 2
+    assert report["after"] < report["before"]
+    assert (tmp_path / "a.svg").read_bytes() == IconThemesSvg.optimize(ARC)
+    assert (tmp_path / "b.svg").read_bytes() == b"<svg/>"